@@ -1 +1,12 @@
 """Toon Climate Component"""
+
+from .const import DATA_HASS_CONFIG
+
+
+async def async_setup(hass, config) -> bool:
+    """
+    Keep the Home Assistant configuration for loading the sensor platform
+    from the climate platform
+    """
+    hass.data[DATA_HASS_CONFIG] = config
+    return True
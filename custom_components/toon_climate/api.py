@@ -0,0 +1,481 @@
+"""
+HTTP client for the happ_thermstat API of a rooted Toon.
+
+This module only depends on aiohttp so it can be used outside of
+Home Assistant as well.
+"""
+
+import asyncio
+import logging
+from time import monotonic
+from typing import Any, Dict, Optional, Tuple
+
+import aiohttp
+import async_timeout
+
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+from .const import (
+    BASE_URL,
+    CONNECTION_LIMIT,
+    DEFAULT_READ_RETRIES,
+    DEFAULT_SETPOINT_DEBOUNCE,
+    DEFAULT_WRITE_RETRIES,
+    DNS_CACHE_TTL,
+    EXTRA_ENDPOINT_TIMEOUT,
+    KEEPALIVE_TIMEOUT,
+    RETRY_DELAY,
+    THERMOSTAT_PATH,
+)
+from .metrics import (
+    RESULT_CONNECTION_ERROR,
+    RESULT_PARSE_ERROR,
+    RESULT_SUCCESS,
+    RESULT_TIMEOUT,
+    RequestMetrics,
+)
+from .resilience import AdaptiveTimeout, CircuitBreaker
+from .scheduler import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_READ,
+    PRIORITY_WRITE,
+    RequestScheduler,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ToonApi:
+    """
+    Client for a single Toon thermostat
+    """
+
+    def __init__(self, name: str, host: str, port: int,
+                 session: Optional[aiohttp.ClientSession] = None,
+                 setpoint_debounce: float = DEFAULT_SETPOINT_DEBOUNCE,
+                 semaphore: Optional[asyncio.Semaphore] = None,
+                 read_retries: int = DEFAULT_READ_RETRIES,
+                 write_retries: int = DEFAULT_WRITE_RETRIES) -> None:
+        """
+        Initialize the Toon API client
+
+        Without a session the client creates and owns a session with a
+        keep-alive connection pool dedicated to this Toon. Requests to the
+        Toon are sent one at a time, a semaphore shared by several clients
+        bounds the concurrent requests to all their Toons.
+        """
+        self._name = name
+        self._host = host
+        self._port = port
+        self._session = session
+        self._owns_session = session is None
+        self._semaphore = semaphore
+        self._setpoint_debounce = setpoint_debounce
+        self._read_retries = read_retries
+        self._write_retries = write_retries
+        self._pending_setpoint = None
+        self._setpoint_task = None
+        self.last_setpoint = None
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.metrics = RequestMetrics()
+        self.breaker = CircuitBreaker()
+        self.read_timeout = AdaptiveTimeout()
+        self.write_timeout = AdaptiveTimeout()
+        self.scheduler = RequestScheduler()
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        """
+        Create a session with a connection pool for this Toon only
+        """
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_end.append(
+            self._on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(
+            self._on_connection_reuseconn)
+        connector = aiohttp.TCPConnector(
+            limit_per_host=CONNECTION_LIMIT,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=DNS_CACHE_TTL,
+            enable_cleanup_closed=True,
+        )
+        return aiohttp.ClientSession(
+            connector=connector, trace_configs=[trace_config]
+        )
+
+    async def _on_connection_create_end(self, session, context,
+                                        params) -> None:
+        """
+        Count a new connection to the Toon
+        """
+        self.connections_created += 1
+
+    async def _on_connection_reuseconn(self, session, context, params) -> None:
+        """
+        Count a request that reused a kept-alive connection
+        """
+        self.connections_reused += 1
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """
+        Return the session, creating the dedicated session when needed
+        """
+        if self._session is None or (self._owns_session
+                                     and self._session.closed):
+            self._session = self._create_session()
+        return self._session
+
+    @property
+    def available(self) -> bool:
+        """
+        Return whether the Toon is considered reachable
+        """
+        return self.breaker.closed
+
+    @property
+    def connection_stats(self) -> Dict[str, int]:
+        """
+        Return the connection reuse counters
+        """
+        return {
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+        }
+
+    async def async_close(self) -> None:
+        """
+        Close the session when it is owned by this client
+        """
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+
+    @property
+    def name(self) -> str:
+        """
+        Return the name used in log messages
+        """
+        return self._name
+
+    def url(self, action: Optional[str],
+            params: Optional[Dict[str, Any]] = None,
+            path: str = THERMOSTAT_PATH) -> str:
+        """
+        Return the url for an action, by default of happ_thermstat
+        """
+        if action is not None:
+            path += "?action=" + action
+        for key, value in (params or {}).items():
+            path += "&" + key + "=" + str(value)
+        return BASE_URL.format(self._host, self._port, path)
+
+    @staticmethod
+    def is_read(action: Optional[str]) -> bool:
+        """
+        Return whether an action only reads data
+        """
+        return action is None or action.lower().startswith("get")
+
+    async def do_api_request(self, action: Optional[str],
+                             params: Optional[Dict[str, Any]] = None,
+                             expected: Optional[Dict[str, str]] = None
+                             ) -> Dict[str, Any]:
+        """
+        Do a happ_thermstat API request, retrying it when it failed
+
+        Reads ('get' actions) are retried right away. A write is only
+        retried when it provably did not reach the Toon. Otherwise it may
+        have been applied, so the state is read back and compared with the
+        expected payload values: when they match the read back state is
+        returned as the response, when they do not the write is retried.
+        An empty response is returned when all attempts failed.
+
+        A request counts as a single failure for the circuit breaker once
+        all its attempts failed, so its threshold is a number of failed
+        requests regardless of the retries. A probe of a half open breaker
+        is not retried.
+        """
+        write = not self.is_read(action)
+        retries = self._write_retries if write else self._read_retries
+        for attempt in range(retries + 1):
+            if attempt and not self.breaker.closed:
+                break
+            if attempt:
+                _LOGGER.debug("%s: retrying '%s' (%s/%s)",
+                              self._name, action, attempt, retries)
+                await asyncio.sleep(RETRY_DELAY)
+            toon_data, result, delivered = await self._async_schedule(
+                action, params
+            )
+            if result in (None, RESULT_SUCCESS, RESULT_PARSE_ERROR):
+                return toon_data
+            if write and delivered:
+                if expected is None:
+                    break
+                applied, state = await self._async_read_back(expected)
+                if applied:
+                    _LOGGER.info("%s: '%s' was applied although its "
+                                 "response was lost", self._name, action)
+                    return {"result": "ok", **state}
+                if not state:
+                    break
+        if self.breaker.record_failure():
+            _LOGGER.warning(
+                "%s is unreachable after %s failed requests, suspending "
+                "requests for %.0f seconds",
+                self._name, self.breaker.failures, self.breaker.retry_in,
+            )
+        return toon_data
+
+    async def _async_read_back(self, expected: Dict[str, str]
+                               ) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Read the thermostat state after a write that may have been applied
+
+        Returns whether the state holds the expected values, and the state
+        (empty when it could not be read).
+        """
+        state, _, _ = await self._async_schedule("getThermostatInfo")
+        applied = bool(state) and all(
+            str(state.get(key)) == value for key, value in expected.items()
+        )
+        return applied, state
+
+    async def _async_schedule(self, action: Optional[str],
+                              params: Optional[Dict[str, Any]] = None,
+                              path: str = THERMOSTAT_PATH,
+                              timeout: Optional[float] = None,
+                              tracked: bool = True,
+                              background: bool = False
+                              ) -> Tuple[Dict[str, Any], Optional[str], bool]:
+        """
+        Queue a single attempt of a request on the scheduler of this Toon
+
+        Commands are sent before polls and polls before background
+        requests, identical queued requests are sent only once.
+        """
+        if background:
+            priority = PRIORITY_BACKGROUND
+        elif self.is_read(action):
+            priority = PRIORITY_READ
+        else:
+            priority = PRIORITY_WRITE
+        return await self.scheduler.async_run(
+            self.url(action, params, path),
+            lambda: self._async_attempt(action, params, path, timeout,
+                                        tracked, background),
+            priority,
+        )
+
+    async def _async_attempt(self, action: Optional[str],
+                             params: Optional[Dict[str, Any]] = None,
+                             path: str = THERMOSTAT_PATH,
+                             timeout: Optional[float] = None,
+                             tracked: bool = True,
+                             background: bool = False
+                             ) -> Tuple[Dict[str, Any], Optional[str], bool]:
+        """
+        Do a single request unless the circuit breaker rejects it
+
+        Returns the response, the result (None when rejected) and whether
+        the request may have reached the Toon. Requests that are not
+        tracked by the circuit breaker are only sent while it is closed, so
+        they never take the probe of a half open breaker. Background
+        requests do not take a slot of the shared semaphore, so a long
+        request never delays the polls of other Toons.
+        """
+        allowed = (self.breaker.allow_request() if tracked
+                   else self.breaker.closed)
+        if not allowed:
+            _LOGGER.debug(
+                "%s: skipping '%s', the Toon is unreachable, next attempt "
+                "in %.0f seconds",
+                self._name, action or path, self.breaker.retry_in,
+            )
+            return {}, None, False
+        if self._semaphore is None or background:
+            return await self._async_request(action, params, path, timeout,
+                                             tracked)
+        async with self._semaphore:
+            return await self._async_request(action, params, path, timeout,
+                                             tracked)
+
+    async def _async_request(self, action: Optional[str],
+                             params: Optional[Dict[str, Any]] = None,
+                             path: str = THERMOSTAT_PATH,
+                             timeout: Optional[float] = None,
+                             tracked: bool = True
+                             ) -> Tuple[Dict[str, Any], str, bool]:
+        """
+        Request an action and return the decoded response, the result and
+        whether the request may have reached the Toon
+
+        The result and latency of every request are recorded in the metrics.
+        A success of a tracked request closes the circuit breaker, failures
+        are recorded by the caller once all retries failed.
+        Reads ('get' actions) and writes use separate adaptive timeouts,
+        unless a timeout is given.
+        Only when no connection could be made the request did certainly
+        not reach the Toon. Only happ_thermstat responses are required to
+        have its 'text/javascript' content type.
+        """
+        adaptive_timeout = (self.read_timeout if self.is_read(action)
+                            else self.write_timeout)
+        url = self.url(action, params, path)
+        content_type = ("text/javascript" if path == THERMOSTAT_PATH
+                        else None)
+        toon_data = {}
+        result = RESULT_SUCCESS
+        delivered = True
+        level = logging.ERROR if self.breaker.closed else logging.DEBUG
+        start = monotonic()
+        try:
+            async with async_timeout.timeout(
+                adaptive_timeout.timeout if timeout is None else timeout
+            ):
+                async with self.session.get(
+                    url, headers={"Accept-Encoding": "identity"}
+                ) as response:
+                    toon_data = await response.json(
+                        loads=json_loads, content_type=content_type
+                    )
+            _LOGGER.debug("Data received from %s: %s", self._name, toon_data)
+        except aiohttp.ContentTypeError as err:
+            result = RESULT_PARSE_ERROR
+            _LOGGER.error("Cannot parse data received from %s: %s",
+                          self._name, err)
+        except aiohttp.ClientConnectorError:
+            result = RESULT_CONNECTION_ERROR
+            delivered = False
+            _LOGGER.log(level, "Cannot connect to %s using url '%s'",
+                        self._name, url)
+        except aiohttp.ClientError:
+            result = RESULT_CONNECTION_ERROR
+            _LOGGER.log(level, "Cannot connect to %s using url '%s'",
+                        self._name, url)
+        except asyncio.TimeoutError:
+            result = RESULT_TIMEOUT
+            _LOGGER.log(
+                level,
+                "Timeout error occurred while connecting to %s using url '%s'",
+                self._name, url
+            )
+        except (TypeError, KeyError, ValueError) as err:
+            result = RESULT_PARSE_ERROR
+            _LOGGER.error("Cannot parse data received from %s: %s",
+                          self._name, err)
+
+        latency = monotonic() - start
+        self.metrics.record(result, latency)
+        if timeout is None and result == RESULT_TIMEOUT:
+            adaptive_timeout.record_timeout()
+        elif timeout is None and result == RESULT_SUCCESS:
+            adaptive_timeout.record(latency)
+        if (tracked
+                and result not in (RESULT_CONNECTION_ERROR, RESULT_TIMEOUT)
+                and self.breaker.record_success()):
+            _LOGGER.info("%s is reachable again", self._name)
+        return toon_data, result, delivered
+
+    async def async_get_thermostat_info(self) -> Dict[str, Any]:
+        """
+        Request 'getThermostatInfo'
+        """
+        _LOGGER.debug("%s: request 'getThermostatInfo'", self._name)
+        return await self.do_api_request("getThermostatInfo")
+
+    async def async_get_endpoint(self, path: str,
+                                 action: Optional[str] = None,
+                                 params: Optional[Dict[str, Any]] = None,
+                                 timeout: float = EXTRA_ENDPOINT_TIMEOUT,
+                                 background: bool = False
+                                 ) -> Dict[str, Any]:
+        """
+        Request one of the other JSON endpoints of the Toon
+
+        The request is sent once, with its own timeout, and its failures
+        are not counted by the circuit breaker: a slow or missing optional
+        endpoint must not mark the thermostat unreachable. A background
+        request waits for all queued polls and commands.
+        """
+        _LOGGER.debug("%s: request '%s'", self._name, action or path)
+        toon_data, _, _ = await self._async_schedule(
+            action, params, path, timeout, tracked=False,
+            background=background,
+        )
+        return toon_data
+
+    async def async_set_setpoint(self, value: int) -> Dict[str, Any]:
+        """
+        Request 'setSetpoint', value is in hundredths of a degree
+
+        Setpoints requested within the debounce window are coalesced: only
+        the latest value is sent and all callers receive its response.
+        """
+        if self._setpoint_debounce <= 0:
+            return await self._async_send_setpoint(value)
+
+        if self._pending_setpoint is not None:
+            _LOGGER.debug(
+                "%s: setpoint %s replaced by %s before it was sent",
+                self._name, str(self._pending_setpoint), str(value),
+            )
+        self._pending_setpoint = value
+        if self._setpoint_task is None:
+            self._setpoint_task = asyncio.get_running_loop().create_task(
+                self._async_flush_setpoint()
+            )
+        return await asyncio.shield(self._setpoint_task)
+
+    async def _async_flush_setpoint(self) -> Dict[str, Any]:
+        """
+        Send the latest pending setpoint after the debounce window
+        """
+        await asyncio.sleep(self._setpoint_debounce)
+        value = self._pending_setpoint
+        self._pending_setpoint = None
+        self._setpoint_task = None
+        return await self._async_send_setpoint(value)
+
+    async def _async_send_setpoint(self, value: int) -> Dict[str, Any]:
+        """
+        Send 'setSetpoint' to the Toon
+        """
+        _LOGGER.debug(
+            "%s: request 'setSetpoint' with 'Setpoint' value %s",
+            self._name, str(value),
+        )
+        self.last_setpoint = value
+        return await self.do_api_request(
+            "setSetpoint", {"Setpoint": value},
+            expected={"currentSetpoint": str(value)},
+        )
+
+    async def async_change_scheme_state(
+            self, state: int, temperature_state: Optional[int] = None,
+            expected: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Request 'changeSchemeState', optionally with a 'temperatureState'
+
+        The expected payload values are used to verify whether the change
+        was applied when its response got lost.
+        """
+        params = {"state": state}
+        if temperature_state is None:
+            _LOGGER.debug(
+                "%s: request 'changeSchemeState' with 'state' value %s ",
+                self._name, str(state)
+            )
+        else:
+            params["temperatureState"] = temperature_state
+            _LOGGER.debug(
+                "%s: request 'changeSchemeState' with 'state' value %s "
+                "and 'temperatureState' value %s",
+                self._name, str(state), str(temperature_state),
+            )
+        return await self.do_api_request("changeSchemeState", params,
+                                         expected=expected)
@@ -0,0 +1,119 @@
+"""
+Import of the round-robin history kept on the Toon into the long-term
+statistics of Home Assistant.
+
+Every logger is imported as an external statistic per Toon, from the hour
+after the last imported one, so an import can be repeated at any time to
+fill the gaps of a Home Assistant outage.
+
+The 'getRrdData' action has no parameters to select a time range, it
+returns the whole archive of a logger. The archives are therefore
+requested one logger at a time as background requests, after the polls
+and commands of the Toon, and converted outside the event loop.
+"""
+
+import asyncio
+import logging
+import re
+from time import time
+from typing import Any, Dict, List, Optional
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    get_last_statistics,
+)
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    INTEGRATION_DOMAIN,
+    RRD_ARCHIVE,
+    RRD_BATCH_SIZE,
+    RRD_LOGGERS,
+    RRD_PATH,
+    RRD_REQUEST_TIMEOUT,
+)
+from .coordinator import ToonDataUpdateCoordinator
+from .rrd import hourly_means, hourly_sums, parse_rrd
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def statistic_id(key: str, name: str) -> str:
+    """
+    Return the id of the external statistic of a logger of a Toon
+    """
+    object_id = re.sub(r"[^a-z0-9_]", "_", f"{key}_{name}".lower())
+    return f"{INTEGRATION_DOMAIN}:{object_id}"
+
+
+def _hourly_rows(data: Dict[str, Any], scale: float, summed: bool,
+                 after: Optional[float], before: float,
+                 last_sum: float) -> List[Dict[str, float]]:
+    """
+    Convert a 'getRrdData' response into the rows of the hours to import
+    """
+    points = parse_rrd(data, scale)
+    if summed:
+        return hourly_sums(points, after, before, last_sum)
+    return hourly_means(points, after, before)
+
+
+async def async_import_rrd(hass: HomeAssistant,
+                           coordinator: ToonDataUpdateCoordinator,
+                           key: str) -> Dict[str, Any]:
+    """
+    Import the history of all loggers of a Toon, returns the number of
+    imported hours per statistic
+
+    The loggers are requested one at a time and the hours are added in
+    batches of RRD_BATCH_SIZE, yielding to the event loop in between. The
+    requests are not retried, a failed logger is imported by the next
+    import.
+    """
+    imported: Dict[str, Any] = {}
+    now = time()
+    for name, (logger, unit, scale, summed) in RRD_LOGGERS.items():
+        stat_id = statistic_id(key, name)
+        last = await get_instance(hass).async_add_executor_job(
+            get_last_statistics, hass, 1, stat_id, True, {"sum"}
+        )
+        last_row = last[stat_id][0] if last.get(stat_id) else None
+        after = last_row["start"] if last_row else None
+
+        data = await coordinator.api.async_get_endpoint(
+            RRD_PATH, "getRrdData",
+            {"loggerName": logger, "rra": RRD_ARCHIVE, "readableTime": 0,
+             "nocache": 1},
+            timeout=RRD_REQUEST_TIMEOUT, background=True,
+        )
+        if not data:
+            _LOGGER.warning("%s: no history received for '%s'",
+                            coordinator.name, logger)
+            imported[stat_id] = None
+            continue
+
+        rows = await hass.async_add_executor_job(
+            _hourly_rows, data, scale, summed, after, now,
+            (last_row or {}).get("sum") or 0,
+        )
+
+        metadata = {
+            "has_mean": not summed,
+            "has_sum": summed,
+            "name": f"{coordinator.name} {name.replace('_', ' ')}",
+            "source": INTEGRATION_DOMAIN,
+            "statistic_id": stat_id,
+            "unit_of_measurement": unit,
+        }
+        for index in range(0, len(rows), RRD_BATCH_SIZE):
+            async_add_external_statistics(hass, metadata, [
+                {**row, "start": dt_util.utc_from_timestamp(row["start"])}
+                for row in rows[index:index + RRD_BATCH_SIZE]
+            ])
+            await asyncio.sleep(0)
+        _LOGGER.info("%s: imported %s hours of '%s'",
+                     coordinator.name, len(rows), logger)
+        imported[stat_id] = len(rows)
+    return imported
@@ -0,0 +1,98 @@
+"""
+Binary sensor support for Toon thermostat.
+
+The binary sensors are created for every configured Toon by the climate
+platform and share its coordinator, they need no configuration of their
+own.
+"""
+
+from dataclasses import dataclass
+import logging
+from typing import Callable, Optional
+
+from homeassistant.components.binary_sensor import (
+    BinarySensorDeviceClass,
+    BinarySensorEntity,
+    BinarySensorEntityDescription,
+)
+from homeassistant.const import CONF_HOST, CONF_NAME, CONF_PORT, EntityCategory
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import INTEGRATION_DOMAIN
+from .coordinator import ToonDataUpdateCoordinator
+from .hub import async_get_hub
+from .snapshot import ThermostatSnapshot
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, kw_only=True)
+class ToonBinarySensorEntityDescription(BinarySensorEntityDescription):
+    """
+    Description of a Toon binary sensor
+    """
+
+    is_on_fn: Callable[[ThermostatSnapshot], Optional[bool]]
+
+
+BINARY_SENSOR_TYPES = (
+    ToonBinarySensorEntityDescription(
+        key="burner",
+        name="Burner",
+        icon="mdi:fire",
+        device_class=BinarySensorDeviceClass.RUNNING,
+        is_on_fn=lambda snapshot: snapshot.burner_info != 0,
+    ),
+    ToonBinarySensorEntityDescription(
+        key="opentherm_comm_error",
+        name="OpenTherm communication error",
+        device_class=BinarySensorDeviceClass.PROBLEM,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        is_on_fn=lambda snapshot: snapshot.ot_comm_error != 0,
+    ),
+)
+
+
+async def async_setup_platform(hass, config, add_devices, discovery_info=None):
+    """
+    Setup the binary sensors of a Toon discovered by the climate platform
+    """
+    if discovery_info is None:
+        return
+
+    hub = async_get_hub(hass)
+    coordinator = hub.coordinators[hub.key(discovery_info)]
+    add_devices(
+        ToonBinarySensor(coordinator, discovery_info, description)
+        for description in BINARY_SENSOR_TYPES
+    )
+
+
+class ToonBinarySensor(CoordinatorEntity, BinarySensorEntity):
+    """
+    Representation of a Toon binary sensor
+    """
+
+    entity_description: ToonBinarySensorEntityDescription
+
+    def __init__(self, coordinator: ToonDataUpdateCoordinator, config,
+                 description: ToonBinarySensorEntityDescription) -> None:
+        """
+        Initialize the Toon binary sensor
+        """
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._attr_name = f"{config[CONF_NAME]} {description.name}"
+        self._attr_unique_id = (
+            f"{INTEGRATION_DOMAIN}_{config[CONF_HOST]}_{config[CONF_PORT]}"
+            f"_{description.key}"
+        )
+
+    @property
+    def is_on(self) -> Optional[bool]:
+        """
+        Return the state of the binary sensor
+        """
+        if self.coordinator.data is None:
+            return None
+        return self.entity_description.is_on_fn(self.coordinator.data)
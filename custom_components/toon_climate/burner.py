@@ -0,0 +1,139 @@
+"""
+Burner cycle and runtime counters of a Toon.
+
+This module has no Home Assistant dependencies.
+"""
+
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from .const import BURNER_MAX_SAMPLE_GAP, BURNER_SHORT_CYCLE
+
+BURNER_OFF = 0
+BURNER_HEATING = 1
+BURNER_HOT_WATER = 2
+BURNER_PREHEATING = 3
+
+DAY = 24 * 3600
+HOUR = 3600
+
+
+class BurnerStatistics:
+    """
+    Counters updated from the 'burnerInfo' value of every poll
+
+    The burner is assumed to stay in the state of a poll until the next
+    poll, so the time between two polls is added to the runtime of the
+    heating or hot water state. Gaps longer than BURNER_MAX_SAMPLE_GAP, for
+    example while Home Assistant was stopped, are not counted. A heating
+    cycle shorter than BURNER_SHORT_CYCLE seconds is counted as a short
+    cycle. Preheating for the next setpoint is heating as well, switching
+    between both does not end a cycle.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize the counters at zero
+        """
+        self.heating_cycles = 0
+        self.hot_water_cycles = 0
+        self.short_cycles = 0
+        self.heating_runtime = 0.0
+        self.hot_water_runtime = 0.0
+        self._starts: Deque[float] = deque()
+        self._state: Optional[int] = None
+        self._updated: Optional[float] = None
+        self._cycle_start: Optional[float] = None
+
+    def update(self, timestamp: float, burner_info: int) -> bool:
+        """
+        Update the counters with the burner state at a POSIX timestamp,
+        returns whether a counter changed
+        """
+        if burner_info == BURNER_PREHEATING:
+            burner_info = BURNER_HEATING
+        changed = False
+        if (self._state is not None
+                and 0 <= timestamp - self._updated <= BURNER_MAX_SAMPLE_GAP):
+            elapsed = timestamp - self._updated
+            if self._state == BURNER_HEATING:
+                self.heating_runtime += elapsed
+                changed = True
+            elif self._state == BURNER_HOT_WATER:
+                self.hot_water_runtime += elapsed
+                changed = True
+
+            if burner_info != self._state:
+                changed = True
+                if (self._state == BURNER_HEATING
+                        and self._cycle_start is not None
+                        and timestamp - self._cycle_start
+                        < BURNER_SHORT_CYCLE):
+                    self.short_cycles += 1
+                if burner_info == BURNER_HEATING:
+                    self.heating_cycles += 1
+                    self._cycle_start = timestamp
+                    self._starts.append(timestamp)
+                elif burner_info == BURNER_HOT_WATER:
+                    self.hot_water_cycles += 1
+        else:
+            self._cycle_start = None
+
+        self._state = burner_info
+        self._updated = timestamp
+        while self._starts and self._starts[0] < timestamp - DAY:
+            self._starts.popleft()
+        return changed
+
+    def cycles_since(self, timestamp: float) -> int:
+        """
+        Return the number of heating cycles started since a POSIX timestamp
+        """
+        return sum(1 for start in self._starts if start >= timestamp)
+
+    def cycles_per_hour(self, now: float) -> int:
+        """
+        Return the number of heating cycles started in the last hour
+        """
+        return self.cycles_since(now - HOUR)
+
+    def cycles_per_day(self, now: float) -> int:
+        """
+        Return the number of heating cycles started in the last day
+        """
+        return self.cycles_since(now - DAY)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Return the counters to be stored
+        """
+        return {
+            "heating_cycles": self.heating_cycles,
+            "hot_water_cycles": self.hot_water_cycles,
+            "short_cycles": self.short_cycles,
+            "heating_runtime": self.heating_runtime,
+            "hot_water_runtime": self.hot_water_runtime,
+            "starts": list(self._starts),
+            "state": self._state,
+            "updated": self._updated,
+            "cycle_start": self._cycle_start,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BurnerStatistics":
+        """
+        Restore stored counters
+        """
+        statistics = cls()
+        statistics.heating_cycles = data.get("heating_cycles", 0)
+        statistics.hot_water_cycles = data.get("hot_water_cycles", 0)
+        statistics.short_cycles = data.get("short_cycles", 0)
+        statistics.heating_runtime = data.get("heating_runtime", 0.0)
+        statistics.hot_water_runtime = data.get("hot_water_runtime", 0.0)
+        statistics._starts.extend(data.get("starts", []))
+        statistics._state = data.get("state")
+        if statistics._state == BURNER_PREHEATING:
+            statistics._state = BURNER_HEATING
+        statistics._updated = data.get("updated")
+        statistics._cycle_start = data.get("cycle_start")
+        return statistics
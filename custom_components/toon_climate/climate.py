@@ -24,27 +24,42 @@ More details:
 """
 
 import asyncio
+from functools import partial
 import logging
+from time import monotonic, time
 from typing import Any, Dict, List, Optional
 
-import aiohttp
-import async_timeout
 import voluptuous as vol
 
 
 from homeassistant.const import (
+    ATTR_ENTITY_ID,
     ATTR_TEMPERATURE,
     CONF_HOST,
     CONF_NAME,
     CONF_PORT,
+    ENTITY_MATCH_ALL,
+    Platform,
     UnitOfTemperature,
 )
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.discovery import async_load_platform
+from homeassistant.helpers.event import async_call_later
 
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 import homeassistant.helpers.config_validation as cv
 
 from homeassistant.components.climate import (
+    ATTR_HVAC_MODE,
+    ATTR_PRESET_MODE,
     PLATFORM_SCHEMA,
     PRESET_AWAY,
     PRESET_COMFORT,
@@ -64,7 +79,31 @@ from .const import (
     ACTIVE_STATE_HOME,
     ACTIVE_STATE_SLEEP,
     ACTIVE_STATE_HOLIDAY,
+    BULK_APPLY_CONCURRENCY,
+    CONF_ADAPTIVE_POLLING,
+    CONF_BOILER_ATTRIBUTES,
+    CONF_EXTRA_ENDPOINTS,
+    CONF_FORCE_REFRESH_INTERVAL,
+    CONF_MODULATION_DEADBAND,
+    CONF_READ_RETRIES,
+    CONF_SETPOINT_DEBOUNCE,
+    CONF_TEMPERATURE_DEADBAND,
+    CONF_WRITE_RETRIES,
+    CONFIRMATION_DELAY,
+    DATA_HASS_CONFIG,
+    DEFAULT_HISTORY_MINUTES,
+    DEFAULT_READ_RETRIES,
+    DEFAULT_SETPOINT_DEBOUNCE,
+    DEFAULT_WRITE_RETRIES,
+    EXTRA_ENDPOINTS,
+    INTEGRATION_DOMAIN,
+    SERVICE_BULK_APPLY,
+    SERVICE_GET_HISTORY,
+    SERVICE_IMPORT_HISTORY,
 )
+from .backfill import async_import_rrd
+from .hub import async_get_hub
+from .snapshot import PAYLOAD_FIELDS, ThermostatSnapshot
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -91,8 +130,12 @@ Supported hvac modes:
 """
 SUPPORT_MODES = [HVACMode.HEAT, HVACMode.AUTO]
 
+"""
+Snapshot fields only shown in the boiler attributes
+"""
+BOILER_FIELDS = ("modulation_level", "boiler_setpoint", "ot_comm_error")
+
 DEFAULT_NAME = "Toon Thermostat"
-BASE_URL = "http://{0}:{1}{2}"
 
 """
 The Toon device can be set to a minumum of 6 degrees celsius and a maximum
@@ -112,18 +155,213 @@ PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
             vol.Coerce(float),
         vol.Optional(CONF_MAX_TEMP, default=DEFAULT_MAX_TEMP):
             vol.Coerce(float),
+        vol.Optional(CONF_ADAPTIVE_POLLING, default=False): cv.boolean,
+        vol.Optional(CONF_SETPOINT_DEBOUNCE,
+                     default=DEFAULT_SETPOINT_DEBOUNCE):
+            vol.All(vol.Coerce(float), vol.Range(min=0)),
+        vol.Optional(CONF_FORCE_REFRESH_INTERVAL, default=0):
+            cv.positive_int,
+        vol.Optional(CONF_TEMPERATURE_DEADBAND, default=0):
+            vol.All(vol.Coerce(float), vol.Range(min=0)),
+        vol.Optional(CONF_MODULATION_DEADBAND, default=0):
+            vol.All(vol.Coerce(int), vol.Range(min=0, max=100)),
+        vol.Optional(CONF_READ_RETRIES, default=DEFAULT_READ_RETRIES):
+            cv.positive_int,
+        vol.Optional(CONF_WRITE_RETRIES, default=DEFAULT_WRITE_RETRIES):
+            cv.positive_int,
+        vol.Optional(CONF_EXTRA_ENDPOINTS, default=[]):
+            vol.All(cv.ensure_list, [vol.In(EXTRA_ENDPOINTS)]),
+        vol.Optional(CONF_BOILER_ATTRIBUTES, default=True): cv.boolean,
     }
 )
 
+"""
+Exactly one target is applied to all thermostats of a bulk_apply call
+"""
+BULK_APPLY_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Required(ATTR_ENTITY_ID): cv.comp_entity_ids,
+            vol.Exclusive(ATTR_TEMPERATURE, "target"): vol.Coerce(float),
+            vol.Exclusive(ATTR_PRESET_MODE, "target"): vol.In(SUPPORT_PRESETS),
+            vol.Exclusive(ATTR_HVAC_MODE, "target"): vol.In(SUPPORT_MODES),
+        }
+    ),
+    cv.has_at_least_one_key(ATTR_TEMPERATURE, ATTR_PRESET_MODE,
+                            ATTR_HVAC_MODE),
+)
+
+
+async def async_bulk_apply(hub, call: ServiceCall) -> ServiceResponse:
+    """
+    Apply a setpoint, preset or hvac mode to many Toons at once
+
+    The commands are sent to up to BULK_APPLY_CONCURRENCY Toons at the same
+    time and the outcome is returned per thermostat.
+    """
+    entity_ids = call.data[ATTR_ENTITY_ID]
+    if entity_ids == ENTITY_MATCH_ALL:
+        entity_ids = list(hub.entities)
+    semaphore = asyncio.Semaphore(BULK_APPLY_CONCURRENCY)
+
+    async def apply(entity_id: str) -> Dict[str, Any]:
+        """
+        Apply the target to a single thermostat
+        """
+        entity = hub.entities.get(entity_id)
+        if entity is None:
+            return {"success": False, "error": "not a Toon thermostat"}
+        async with semaphore:
+            if ATTR_TEMPERATURE in call.data:
+                success = await entity.async_set_temperature(
+                    **{ATTR_TEMPERATURE: call.data[ATTR_TEMPERATURE]}
+                )
+            elif ATTR_PRESET_MODE in call.data:
+                success = await entity.async_set_preset_mode(
+                    call.data[ATTR_PRESET_MODE]
+                )
+            else:
+                success = await entity.async_set_hvac_mode(
+                    call.data[ATTR_HVAC_MODE]
+                )
+        if not success:
+            return {"success": False, "error": "command failed"}
+        return {"success": True}
+
+    outcomes = await asyncio.gather(
+        *(apply(entity_id) for entity_id in entity_ids)
+    )
+    failed = sum(not outcome["success"] for outcome in outcomes)
+    if failed:
+        _LOGGER.warning("bulk_apply failed for %s of %s thermostats",
+                        failed, len(outcomes))
+    return {"results": dict(zip(entity_ids, outcomes))}
+
+
+GET_HISTORY_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_ENTITY_ID): cv.comp_entity_ids,
+        vol.Optional("minutes", default=DEFAULT_HISTORY_MINUTES):
+            cv.positive_int,
+        vol.Optional("samples", default=False): cv.boolean,
+    }
+)
+
+
+async def async_get_history(hub, call: ServiceCall) -> ServiceResponse:
+    """
+    Return the recent samples of Toons from their in-memory history
+
+    Per thermostat the number of samples in the window and the minimum,
+    maximum, mean and last value of every field are returned, and the
+    samples themselves when requested.
+    """
+    entity_ids = call.data[ATTR_ENTITY_ID]
+    if entity_ids == ENTITY_MATCH_ALL:
+        entity_ids = list(hub.entities)
+    since = time() - call.data["minutes"] * 60
+    response = {}
+    for entity_id in entity_ids:
+        entity = hub.entities.get(entity_id)
+        if entity is None:
+            continue
+        history = entity.coordinator.history
+        response[entity_id] = history.window(since)
+        if call.data["samples"]:
+            response[entity_id]["samples"] = history.samples(since)
+    return response
+
+
+IMPORT_HISTORY_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_ENTITY_ID): cv.comp_entity_ids,
+    }
+)
+
+
+async def async_import_history(hass: HomeAssistant, hub,
+                               call: ServiceCall) -> ServiceResponse:
+    """
+    Import the history kept on Toons into the long-term statistics
+
+    Returns the number of imported hours per statistic of every Toon.
+    """
+    if "recorder" not in hass.config.components:
+        raise HomeAssistantError("The recorder is needed to import history")
+
+    entity_ids = call.data[ATTR_ENTITY_ID]
+    if entity_ids == ENTITY_MATCH_ALL:
+        entity_ids = list(hub.entities)
+    entities = [hub.entities[entity_id] for entity_id in entity_ids
+                if entity_id in hub.entities]
+    keys = {id(coordinator): key
+            for key, coordinator in hub.coordinators.items()}
+    results = await asyncio.gather(
+        *(async_import_rrd(hass, entity.coordinator,
+                           keys[id(entity.coordinator)])
+          for entity in entities)
+    )
+    return {
+        entity.entity_id: result for entity, result in zip(entities, results)
+    }
+
+
 async def async_setup_platform(hass, config, add_devices, discovery_info=None):
     """
     Setup the Toon thermostat
+
+    The entity starts from the last stored data of the Toon, the first
+    fetch runs in the background so a slow or unreachable Toon does not
+    delay the startup of Home Assistant.
     """
-    session = async_get_clientsession(hass)
-    add_devices([ThermostatDevice(session, config)], True)
+    hub = async_get_hub(hass)
+    new_toon = hub.key(config) not in hub.coordinators
+    coordinator = hub.async_get_coordinator(config)
+    if new_toon:
+        await coordinator.async_restore()
+        hass.async_create_task(coordinator.async_refresh())
+    add_devices([ThermostatDevice(coordinator, config)])
+
+    if not hass.services.has_service(INTEGRATION_DOMAIN, SERVICE_BULK_APPLY):
+        hass.services.async_register(
+            INTEGRATION_DOMAIN, SERVICE_BULK_APPLY,
+            partial(async_bulk_apply, hub),
+            schema=BULK_APPLY_SCHEMA,
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+    if not hass.services.has_service(INTEGRATION_DOMAIN, SERVICE_GET_HISTORY):
+        hass.services.async_register(
+            INTEGRATION_DOMAIN, SERVICE_GET_HISTORY,
+            partial(async_get_history, hub),
+            schema=GET_HISTORY_SCHEMA,
+            supports_response=SupportsResponse.ONLY,
+        )
+    if not hass.services.has_service(INTEGRATION_DOMAIN,
+                                     SERVICE_IMPORT_HISTORY):
+        hass.services.async_register(
+            INTEGRATION_DOMAIN, SERVICE_IMPORT_HISTORY,
+            partial(async_import_history, hass, hub),
+            schema=IMPORT_HISTORY_SCHEMA,
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+
+    if new_toon:
+        discovery_info = {
+            CONF_NAME: config.get(CONF_NAME),
+            CONF_HOST: config.get(CONF_HOST),
+            CONF_PORT: config.get(CONF_PORT),
+            CONF_EXTRA_ENDPOINTS: config.get(CONF_EXTRA_ENDPOINTS),
+        }
+        for platform in (Platform.SENSOR, Platform.BINARY_SENSOR):
+            hass.async_create_task(
+                async_load_platform(
+                    hass, platform, INTEGRATION_DOMAIN, discovery_info,
+                    hass.data.get(DATA_HASS_CONFIG, {}),
+                )
+            )
 
 
-class ThermostatDevice(ClimateEntity):
+class ThermostatDevice(CoordinatorEntity, ClimateEntity):
     """
     Representation of a Toon climate device
     """
@@ -135,11 +373,12 @@ class ThermostatDevice(ClimateEntity):
     )
     _attr_temperature_unit = UnitOfTemperature.CELSIUS
 
-    def __init__(self, session, config) -> None:
+    def __init__(self, coordinator, config) -> None:
         """
         Initialize the Toon climate device
         """
-        self._session = session
+        super().__init__(coordinator)
+        self._api = coordinator.api
         self._name = config.get(CONF_NAME)
         self._host = config.get(CONF_HOST)
         self._port = config.get(CONF_PORT)
@@ -152,87 +391,164 @@ class ThermostatDevice(ClimateEntity):
         self._attr_unique_id = f"{DOMAIN}_{self._name}_{self._host}"
         self._attr_hvac_modes = SUPPORT_MODES
         self._attr_preset_modes = SUPPORT_PRESETS
+        self._force_refresh_interval = config.get(CONF_FORCE_REFRESH_INTERVAL)
+        self._boiler_attributes = config.get(CONF_BOILER_ATTRIBUTES, True)
+        self._last_written = monotonic()
 
         """
-        Standard thermostat data for the first and second edition of Toon
+        Standard thermostat data for the first and second edition of Toon,
+        the device snapshot with any optimistic values applied
         """
-        self._data = None
-        self._active_state = None
-        self._burner_info = None
-        self._modulation_level = None
-        self._current_setpoint = None
-        self._current_temperature = None
-        self._ot_comm_error = None
-        self._program_state = None
-        self._hvac_mode = None
-        self._boiler_setpoint = None
+        self._device_snapshot = None
+        self._snapshot = ThermostatSnapshot()
 
-    @staticmethod
-    async def do_api_request(name, session, url):
         """
-        Do an API request
+        Values shown optimistically after a command until the Toon confirms
         """
-        toon_data = {}
-        try:
-            async with async_timeout.timeout(5):
-                response = await session.get(
-                    url, headers={"Accept-Encoding": "identity"}
-                )
-            toon_data = await response.json(content_type="text/javascript")
-            _LOGGER.debug("Data received from %s: %s", name, toon_data)
-        except aiohttp.ClientError:
-            _LOGGER.error("Cannot connect to %s using url '%s'", name, url)
-        except asyncio.TimeoutError:
-            _LOGGER.error(
-                "Timeout error occurred while connecting to %s using url '%s'",
-                name, url
-            )
-        except (TypeError, KeyError) as err:
-            _LOGGER.error(f"Cannot parse data received from %s: %s", name, err)
+        self._optimistic = {}
+        self._awaiting_confirmation = False
+        self._cancel_confirmation = None
+        self._update_from_data(coordinator.data)
+
+    async def async_added_to_hass(self) -> None:
+        """
+        Register the entity with the hub for the services
 
-        return toon_data
+        The first fetch runs in the background and may have finished
+        before the entity listened to the coordinator, so its data is
+        applied here. The state is written after this method returns.
+        """
+        await super().async_added_to_hass()
+        async_get_hub(self.hass).entities[self.entity_id] = self
+        self._update_from_data(self.coordinator.data)
 
-    @property
-    def should_poll(self):
+    async def async_will_remove_from_hass(self) -> None:
         """
-        Polling needed for thermostat
+        Cancel a pending confirmation when the entity is removed
         """
-        return True
+        async_get_hub(self.hass).entities.pop(self.entity_id, None)
+        if self._cancel_confirmation is not None:
+            self._cancel_confirmation()
+            self._cancel_confirmation = None
+        await super().async_will_remove_from_hass()
 
-    async def async_update(self) -> None:
+    @callback
+    def _handle_coordinator_update(self) -> None:
         """
-        Update local data with thermostat data (Toon 1 and Toon 2)
+        Handle updated data from the coordinator
+
+        The state is only written when the thermostat data or availability
+        changed, or when the optional force refresh interval has passed.
+        In the latter case the state is written with force_update so
+        last_updated advances. Without the boiler attributes changes of
+        the boiler values alone do not write the state.
         """
-        _LOGGER.debug(
-            "%s: request 'getThermostatInfo'", self._name,
+        previous, available = self._snapshot, self.available
+        self._update_from_data(self.coordinator.data)
+        changed = set(self._snapshot.diff(previous))
+        if not self._boiler_attributes:
+            changed.difference_update(BOILER_FIELDS)
+        now = monotonic()
+        force = (
+            self._force_refresh_interval > 0
+            and now - self._last_written >= self._force_refresh_interval
         )
+        if not changed and self.available == available and not force:
+            return
+
+        _LOGGER.debug("%s: writing state, changed: %s", self._name,
+                      ", ".join(sorted(changed)) or "none")
+        self._last_written = now
+        self._attr_force_update = force
+        super()._handle_coordinator_update()
+        self._attr_force_update = False
+
+    @callback
+    def _async_set_optimistic(self, **values) -> None:
+        """
+        Show the requested values immediately until the Toon confirms them
+        """
+        self._optimistic.update(values)
+        self._awaiting_confirmation = True
+        self._snapshot = self._snapshot.replace(**values)
+        self.async_write_ha_state()
 
-        self._data = await self.do_api_request(
-            self._name, self._session,
-            BASE_URL.format(
-                self._host, self._port,
-                "/happ_thermstat?action=getThermostatInfo"
-            ),
+    @callback
+    def _async_schedule_confirmation(self) -> None:
+        """
+        Confirm the optimistic values shortly after the command was sent
+        """
+        if self._cancel_confirmation is not None:
+            self._cancel_confirmation()
+        self._cancel_confirmation = async_call_later(
+            self.hass, CONFIRMATION_DELAY, self._async_confirm
         )
 
-        if self._data:
-            self._active_state = int(self._data["activeState"])
-            self._burner_info = int(self._data["burnerInfo"])
-            self._modulation_level = int(self._data["currentModulationLevel"])
-            self._current_setpoint = int(self._data["currentSetpoint"]) / 100
-            self._current_temperature = int(self._data["currentTemp"]) / 100
-            self._ot_comm_error = int(self._data["otCommError"])
-            self._program_state = int(self._data["programState"])
-            self._boiler_setpoint = int(self._data["currentInternalBoilerSetpoint"])
-
-            if self._active_state == 4:
-                self._hvac_mode = HVACMode.OFF
-            elif self._program_state == 0:
-                self._hvac_mode = HVACMode.HEAT
-            elif self._program_state == 1 or self._program_state == 2:
-                self._hvac_mode = HVACMode.AUTO
-            else:
-                self._hvac_mode = None
+    async def _async_confirm(self, _now) -> None:
+        """
+        Fetch the thermostat data to confirm the optimistic values
+        """
+        self._cancel_confirmation = None
+        self._awaiting_confirmation = False
+        await self.coordinator.async_refresh()
+
+    @callback
+    def _async_handle_write_response(self, response, expected) -> bool:
+        """
+        Apply the response of a command, returns whether it succeeded
+
+        A failed command rolls back the optimistic values right away. When
+        the response fully describes the new state, like the state read
+        back after a lost response, no confirmation fetch is needed.
+        Otherwise the Toon may have changed more than the command asked
+        for, a setpoint also switches it to a manual setpoint, so the state
+        is confirmed with a fetch.
+        """
+        confirm = not set(PAYLOAD_FIELDS).issubset(response or {})
+        if not confirm:
+            self._optimistic = {}
+            self._awaiting_confirmation = False
+
+        if not self.coordinator.async_apply_write_response(response, expected):
+            _LOGGER.warning("%s: command failed, rolling back", self._name)
+            if self._cancel_confirmation is not None:
+                self._cancel_confirmation()
+                self._cancel_confirmation = None
+            self._optimistic = {}
+            self._awaiting_confirmation = False
+            self._device_snapshot = self.coordinator.data
+            self._snapshot = self._device_snapshot or ThermostatSnapshot()
+            self.async_write_ha_state()
+            return False
+        self.coordinator.async_boost()
+        if confirm:
+            self._async_schedule_confirmation()
+        return True
+
+    def _update_from_data(self, data: Optional[ThermostatSnapshot]) -> None:
+        """
+        Update local data with thermostat data (Toon 1 and Toon 2)
+
+        Optimistic values are kept until the confirmation fetch, after that
+        the values reported by the Toon win and a rollback is logged.
+        """
+        if data is None or data is self._device_snapshot:
+            return
+        self._device_snapshot = data
+
+        if self._optimistic and self._awaiting_confirmation:
+            self._snapshot = data.replace(**self._optimistic)
+            return
+
+        for field, value in self._optimistic.items():
+            if getattr(data, field) != value:
+                _LOGGER.warning(
+                    "%s: the Toon reports %s %s instead of the requested %s, "
+                    "rolling back",
+                    self._name, field, getattr(data, field), value,
+                )
+        self._optimistic = {}
+        self._snapshot = data
 
     @property
     def name(self) -> str:
@@ -260,22 +576,22 @@ class ThermostatDevice(ClimateEntity):
         """
         Return the current temperature
         """
-        return self._current_temperature
+        return self._snapshot.current_temperature
 
     @property
     def target_temperature(self) -> Optional[float]:
         """
         Return current target temperature (temp we try to reach)
         """
-        return self._current_setpoint
+        return self._snapshot.current_setpoint
 
-    async def async_set_temperature(self, **kwargs) -> None:
+    async def async_set_temperature(self, **kwargs) -> bool:
         """
-        Set target temperature
+        Set target temperature, returns whether the Toon accepted it
         """
         target_temperature = kwargs.get(ATTR_TEMPERATURE)
         if target_temperature is None:
-            return
+            return False
 
         value = int(target_temperature * 100)
 
@@ -286,24 +602,15 @@ class ThermostatDevice(ClimateEntity):
                 "The temperature can be set between %s°C and %s°C",
                 self._name, str(target_temperature),
                 self._min_temp, self._max_temp)
-            return
+            return False
 
-        _LOGGER.debug(
-            "%s: request 'setSetpoint' with 'Setpoint' value %s",
-            self._name, str(value),
-        )
+        self._async_set_optimistic(current_setpoint=value / 100)
 
-        self._data = await self.do_api_request(
-            self._name, self._session,
-            BASE_URL.format(
-                self._host, self._port,
-                "/happ_thermstat?action=setSetpoint"
-                "&Setpoint=" + str(value),
-            ),
+        response = await self._api.async_set_setpoint(value)
+        return self._async_handle_write_response(
+            response, {"currentSetpoint": str(self._api.last_setpoint)}
         )
 
-        self._current_setpoint = target_temperature
-
     @property
     def hvac_action(self) -> HVACAction:
         """
@@ -315,7 +622,8 @@ class ThermostatDevice(ClimateEntity):
         - 2: Burner is on (heating for generating warm water)
         - 3: Burner is on (preheating for next setpoint)
         """
-        if (self._burner_info == 1) or (self._burner_info == 3):
+        burner_info = self._snapshot.burner_info
+        if (burner_info == 1) or (burner_info == 3):
             return HVACAction.HEATING
 
         return HVACAction.IDLE
@@ -340,11 +648,12 @@ class ThermostatDevice(ClimateEntity):
             ACTIVE_STATE_SLEEP: PRESET_SLEEP,
             ACTIVE_STATE_HOLIDAY: PRESET_ECO
         }
-        return mapping.get(self._active_state)
+        return mapping.get(self._snapshot.active_state)
 
-    async def async_set_preset_mode(self, preset_mode) -> None:
+    async def async_set_preset_mode(self, preset_mode) -> bool:
         """
-        Set new preset mode (comfort, home, sleep, away, eco)
+        Set new preset mode (comfort, home, sleep, away, eco), returns
+        whether the Toon accepted it
 
         Toon programState values
         - 0: Programm mode is off (manually changing presets)
@@ -371,7 +680,7 @@ class ThermostatDevice(ClimateEntity):
                 "%s: set preset mode to '%s' is not supported. "
                 "Supported preset modes are %s",
                 self._name, str(preset_mode.lower()), SUPPORT_PRESETS)
-            return None
+            return False
 
         if preset_mode.lower() == PRESET_COMFORT:
             scheme_temp = 0
@@ -397,26 +706,17 @@ class ThermostatDevice(ClimateEntity):
             self._name, str(preset_mode.lower()),
         )
 
-        _LOGGER.debug(
-            "%s: request 'changeSchemeState' with 'state' value %s "
-            "and 'temperatureState' value %s",
-            self._name, str(scheme_state),
-            str(scheme_temp),
-        )
+        self._async_set_optimistic(active_state=scheme_temp)
 
-        self._data = await self.do_api_request(
-            self._name, self._session,
-            BASE_URL.format(
-                self._host, self._port,
-                "/happ_thermstat?action=changeSchemeState"
-                "&state=" + str(scheme_state) +
-                "&temperatureState=" + str(scheme_temp),
-            ),
+        expected = {"activeState": str(scheme_temp)}
+        response = await self._api.async_change_scheme_state(
+            scheme_state, scheme_temp, expected=expected
         )
+        return self._async_handle_write_response(response, expected)
 
-    async def async_set_hvac_mode(self, hvac_mode: str) -> None:
+    async def async_set_hvac_mode(self, hvac_mode: str) -> bool:
         """
-        Set new target hvac mode
+        Set new target hvac mode, returns whether the Toon accepted it
 
         Support modes:
         - HVACMode.HEAT: Heat to a target temperature (schedule off)
@@ -432,85 +732,66 @@ class ThermostatDevice(ClimateEntity):
                 "%s: set hvac mode to '%s' is not supported. "
                 "Supported hvac modes are %s",
                 self._name, str(hvac_mode), SUPPORT_MODES)
-            return None
+            return False
 
         _LOGGER.debug("%s: set hvac mode to '%s'", self._name, str(hvac_mode))
 
-        if (hvac_mode == HVACMode.HEAT) and (self._active_state == 4):
-            _LOGGER.debug(
-                "%s: request 'changeSchemeState' with 'state' value %s "
-                "and 'temperatureState' value %s",
-                self._name, str(0), str(1),
+        if (hvac_mode == HVACMode.HEAT) and (self._snapshot.active_state == 4):
+            self._async_set_optimistic(
+                program_state=0, active_state=ACTIVE_STATE_HOME
             )
-            self._data = await self.do_api_request(
-                self._name, self._session,
-                BASE_URL.format(
-                    self._host, self._port,
-                    "/happ_thermstat?action=changeSchemeState"
-                    "&state=0"
-                    "&temperatureState=1",
-                ),
+            expected = {"programState": "0", "activeState": "1"}
+            response = await self._api.async_change_scheme_state(
+                0, 1, expected=expected
             )
         elif hvac_mode == HVACMode.HEAT:
-            _LOGGER.debug(
-                "%s: request 'changeSchemeState' with 'state' value %s ",
-                self._name, str(0)
-            )
-            self._data = await self.do_api_request(
-                self._name, self._session,
-                BASE_URL.format(
-                    self._host, self._port,
-                    "/happ_thermstat?action=changeSchemeState"
-                    "&state=0",
-                ),
+            self._async_set_optimistic(program_state=0)
+            expected = {"programState": "0"}
+            response = await self._api.async_change_scheme_state(
+                0, expected=expected
             )
         elif hvac_mode == HVACMode.AUTO:
-            _LOGGER.debug(
-                "%s: request 'changeSchemeState' with 'state' value %s ",
-                self._name, str(1)
+            self._async_set_optimistic(program_state=1)
+            expected = {"programState": "1"}
+            response = await self._api.async_change_scheme_state(
+                1, expected=expected
             )
-            self._data = await self.do_api_request(
-                self._name, self._session,
-                BASE_URL.format(
-                    self._host, self._port,
-                    "/happ_thermstat?action=changeSchemeState"
-                    "&state=1",
-                ),
-            )
-        elif hvac_mode == HVACMode.OFF:
-            _LOGGER.debug(
-                "%s: request 'changeSchemeState' with 'state' value %s "
-                "and 'temperatureState' value %s",
-                self._name, str(8), str(4),
-            )
-            self._data = await self.do_api_request(
-                self._name, self._session,
-                BASE_URL.format(
-                    self._host, self._port,
-                    "/happ_thermstat?action=changeSchemeState"
-                    "&state=8"
-                    "&temperatureState=4",
-                ),
+        else:
+            self._async_set_optimistic(active_state=ACTIVE_STATE_HOLIDAY)
+            expected = {"activeState": "4"}
+            response = await self._api.async_change_scheme_state(
+                8, 4, expected=expected
             )
 
+        return self._async_handle_write_response(response, expected)
+
     @property
     def hvac_mode(self) -> Optional[str]:
         """
         Return the current operation mode
         """
-        return self._hvac_mode
+        if self._snapshot.active_state == 4:
+            return HVACMode.OFF
+        if self._snapshot.program_state == 0:
+            return HVACMode.HEAT
+        if self._snapshot.program_state in (1, 2):
+            return HVACMode.AUTO
+        return None
 
     @property
-    def extra_state_attributes(self) -> Dict[str, Any]:
+    def extra_state_attributes(self) -> Optional[Dict[str, Any]]:
         """
         Return additional Toon Thermostat status details
 
         The information will be available in Home Assistant for reporting
-        or automations based on teh provided information
+        or automations based on teh provided information. The boiler values
+        are also available as sensors and can be left out.
         """
+        if not self._boiler_attributes:
+            return None
         return {
-            "burner_info": self._burner_info,
-            "modulation_level": self._modulation_level,
-            "boiler_setpoint": self._boiler_setpoint,
-            "opentherm_comm_error": self._ot_comm_error,
+            "burner_info": self._snapshot.burner_info,
+            "modulation_level": self._snapshot.modulation_level,
+            "boiler_setpoint": self._snapshot.boiler_setpoint,
+            "opentherm_comm_error": self._snapshot.ot_comm_error,
         }
@@ -7,3 +7,153 @@ ACTIVE_STATE_COMFORT = 0
 ACTIVE_STATE_HOLIDAY = 4
 ACTIVE_STATE_HOME = 1
 ACTIVE_STATE_SLEEP = 2
+
+INTEGRATION_DOMAIN = "toon_climate"
+
+DATA_TOON_CLIMATE = "toon_climate"
+DATA_HASS_CONFIG = "toon_climate_hass_config"
+
+CONF_ADAPTIVE_POLLING = "adaptive_polling"
+CONF_SETPOINT_DEBOUNCE = "setpoint_debounce"
+CONF_FORCE_REFRESH_INTERVAL = "force_refresh_interval"
+CONF_TEMPERATURE_DEADBAND = "temperature_deadband"
+CONF_MODULATION_DEADBAND = "modulation_deadband"
+CONF_READ_RETRIES = "read_retries"
+CONF_WRITE_RETRIES = "write_retries"
+CONF_EXTRA_ENDPOINTS = "extra_endpoints"
+CONF_BOILER_ATTRIBUTES = "boiler_attributes"
+
+SERVICE_BULK_APPLY = "bulk_apply"
+SERVICE_GET_HISTORY = "get_history"
+SERVICE_IMPORT_HISTORY = "import_history"
+
+BASE_URL = "http://{0}:{1}{2}"
+THERMOSTAT_PATH = "/happ_thermstat"
+
+"""
+Other endpoints of the Toon that can be fetched in the same poll cycle as
+'getThermostatInfo', as path and action
+"""
+ENDPOINT_SENSORS = "sensors"
+ENDPOINT_BOILER = "boiler"
+ENDPOINT_POWER_USAGE = "power_usage"
+EXTRA_ENDPOINTS = {
+    ENDPOINT_SENSORS: ("/tsc/sensors", None),
+    ENDPOINT_BOILER: ("/boilerstatus/boilervalues.txt", None),
+    ENDPOINT_POWER_USAGE: ("/happ_pwrusage", "GetCurrentUsage"),
+}
+
+"""
+Timeout in seconds of a request to another endpoint. These requests are
+not retried and do not count for the circuit breaker of the Toon.
+"""
+EXTRA_ENDPOINT_TIMEOUT = 5
+
+DEFAULT_SCAN_INTERVAL = 60
+REQUEST_TIMEOUT = 5
+
+"""
+Adaptive polling: poll fast for a short while after a command was sent and
+back off exponentially up to the maximum interval while nothing changes.
+"""
+FAST_SCAN_INTERVAL = 2
+FAST_POLL_WINDOW = 10
+MAX_SCAN_INTERVAL = 300
+
+"""
+Connection pool of the HTTP session dedicated to each Toon. The web server
+of the Toon is single-threaded so a single connection is kept alive and
+reused for all requests.
+"""
+CONNECTION_LIMIT = 1
+KEEPALIVE_TIMEOUT = 60
+DNS_CACHE_TTL = 300
+
+DEFAULT_SETPOINT_DEBOUNCE = 0.5
+
+CONFIRMATION_DELAY = 2
+
+"""
+Maximum number of requests running at the same time over all Toons
+"""
+MAX_PARALLEL_REQUESTS = 4
+
+"""
+Number of recent thermostat samples kept per Toon, a day at the default
+scan interval
+"""
+HISTORY_SIZE = 1440
+DEFAULT_HISTORY_MINUTES = 60
+
+"""
+Burner statistics: a heating cycle shorter than BURNER_SHORT_CYCLE seconds
+is a short cycle, polls further apart than BURNER_MAX_SAMPLE_GAP seconds
+are not counted in the runtimes.
+"""
+BURNER_SHORT_CYCLE = 300
+BURNER_MAX_SAMPLE_GAP = 900
+
+"""
+The burner statistics and the last thermostat data of every Toon are
+stored at most STORE_SAVE_DELAY seconds after they changed
+"""
+STORE_SAVE_DELAY = 60
+STORAGE_VERSION = 1
+
+"""
+Round-robin history kept on the Toon, imported into the long-term
+statistics: the statistic name and its logger on the Toon, unit, scale of
+the logged values and whether the logger is a meter reading (summed)
+rather than a measurement (averaged)
+"""
+RRD_PATH = "/hcb_rrd"
+RRD_ARCHIVE = "10yrhours"
+RRD_LOGGERS = {
+    "temperature": ("thermstat_currentTemp", "°C", 1, False),
+    "setpoint": ("thermstat_currentSetpoint", "°C", 1, False),
+    "gas": ("gas_quantity", "m³", 0.001, True),
+    "electricity_normal": ("elec_quantity_nt", "kWh", 0.001, True),
+    "electricity_low": ("elec_quantity_lt", "kWh", 0.001, True),
+}
+RRD_REQUEST_TIMEOUT = 60
+RRD_BATCH_SIZE = 500
+
+"""
+Maximum number of Toons a bulk_apply service call sends commands to at the
+same time, their requests are still bounded by MAX_PARALLEL_REQUESTS
+"""
+BULK_APPLY_CONCURRENCY = 10
+
+"""
+Fraction of the golden ratio, spreads the polls of any number of Toons
+evenly over the scan interval without knowing their number up front.
+"""
+STAGGER_STEP = 0.6180339887
+
+"""
+Circuit breaker: after this many consecutive failures requests to a Toon
+are suspended, for a backoff in seconds that doubles up to the maximum
+"""
+BREAKER_FAILURE_THRESHOLD = 3
+BREAKER_BASE_BACKOFF = 10
+BREAKER_MAX_BACKOFF = 600
+BREAKER_JITTER = 0.2
+
+"""
+Retries of failed requests, after a short delay. Reads are retried right
+away, writes only when they provably did not reach the Toon or a read back
+shows they were not applied.
+"""
+DEFAULT_READ_RETRIES = 2
+DEFAULT_WRITE_RETRIES = 1
+RETRY_DELAY = 0.2
+
+"""
+Adaptive request timeout: the p99 of the recent latencies of a Toon times
+the factor, clamped between the minimum and REQUEST_TIMEOUT seconds. Until
+enough latencies are known REQUEST_TIMEOUT is used.
+"""
+ADAPTIVE_TIMEOUT_FACTOR = 3
+ADAPTIVE_TIMEOUT_MIN = 0.5
+ADAPTIVE_TIMEOUT_SAMPLES = 20
+ADAPTIVE_TIMEOUT_WINDOW = 100
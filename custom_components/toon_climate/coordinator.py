@@ -0,0 +1,275 @@
+"""
+Data update coordinator for the Toon thermostat.
+
+A single coordinator is created per Toon (host and port) and shared by all
+entities of that device, so 'getThermostatInfo' is requested only once per
+update interval regardless of the number of consumers. Optional other
+endpoints of the Toon are fetched in the same cycle.
+"""
+
+import asyncio
+from datetime import timedelta
+import logging
+from time import monotonic, time
+from typing import Any, Dict, Optional, Sequence
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import (
+    DataUpdateCoordinator,
+    UpdateFailed,
+)
+
+from .api import ToonApi
+from .burner import BurnerStatistics
+from .const import (
+    EXTRA_ENDPOINTS,
+    FAST_POLL_WINDOW,
+    FAST_SCAN_INTERVAL,
+    MAX_SCAN_INTERVAL,
+    STORAGE_VERSION,
+    STORE_SAVE_DELAY,
+)
+from .history import SampleHistory
+from .snapshot import PAYLOAD_FIELDS, ThermostatSnapshot
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ToonDataUpdateCoordinator(DataUpdateCoordinator):
+    """
+    Fetch thermostat data from a single Toon
+    """
+
+    def __init__(self, hass: HomeAssistant, api: ToonApi,
+                 update_interval: timedelta,
+                 adaptive_polling: bool = False,
+                 temperature_deadband: float = 0,
+                 modulation_deadband: int = 0,
+                 stagger_offset: timedelta = timedelta(),
+                 extra_endpoints: Sequence[str] = (),
+                 storage_key: Optional[str] = None) -> None:
+        """
+        Initialize the Toon coordinator
+
+        The burner statistics and the last data are stored under the
+        storage key.
+        """
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=api.name,
+            update_interval=update_interval,
+        )
+        self.api = api
+        self._scan_interval = update_interval
+        self._adaptive_polling = adaptive_polling
+        self._fast_poll_until = 0.0
+        self._temperature_deadband = temperature_deadband
+        self._modulation_deadband = modulation_deadband
+        self._stagger_offset = stagger_offset
+        self._polled = False
+        self._extra_endpoints = tuple(extra_endpoints)
+        self.extra_data: Dict[str, Dict[str, Any]] = {}
+        self._writes = 0
+        self.history = SampleHistory()
+        self.burner = BurnerStatistics()
+        self._store = (Store(hass, STORAGE_VERSION, storage_key)
+                       if storage_key else None)
+
+    @callback
+    def _schedule_refresh(self) -> None:
+        """
+        Schedule a refresh, delayed by the stagger offset until the first
+        poll completed
+
+        The first poll runs right away in the background and schedules the
+        next one when it completes, that poll and the polls after it keep
+        the offset.
+        """
+        if not self._stagger_offset or self.update_interval is None:
+            super()._schedule_refresh()
+            return
+        update_interval = self.update_interval
+        self.update_interval = update_interval + self._stagger_offset
+        if self._polled:
+            self._stagger_offset = timedelta()
+        try:
+            super()._schedule_refresh()
+        finally:
+            self.update_interval = update_interval
+
+    @callback
+    def async_boost(self) -> None:
+        """
+        Poll fast for a short while, used after a command was sent
+
+        The poll that is already scheduled is moved forward, it may have
+        been scheduled at the slow interval right before.
+        """
+        if not self._adaptive_polling:
+            return
+        self._fast_poll_until = monotonic() + FAST_POLL_WINDOW
+        self.update_interval = timedelta(seconds=FAST_SCAN_INTERVAL)
+        if self._listeners:
+            self._schedule_refresh()
+
+    def _next_update_interval(self, data: Optional[ThermostatSnapshot]
+                              ) -> timedelta:
+        """
+        Return the interval until the next poll
+
+        Polls fast right after a command, uses the configured scan interval
+        while the payload changes or the burner is on and doubles the
+        interval up to MAX_SCAN_INTERVAL while the payload is stable.
+        """
+        if monotonic() < self._fast_poll_until:
+            return timedelta(seconds=FAST_SCAN_INTERVAL)
+        if data is None or data != self.data or data.burner_info != 0:
+            return self._scan_interval
+        return max(
+            self._scan_interval,
+            min(self.update_interval * 2,
+                timedelta(seconds=MAX_SCAN_INTERVAL)),
+        )
+
+    @callback
+    def async_apply_write_response(self, response: Dict[str, Any],
+                                   expected: Dict[str, Any]) -> bool:
+        """
+        Validate the response of a command and apply the state it reports
+
+        The Toon answers commands with a 'result' of 'ok'. Thermostat values
+        echoed in the response, or else the expected values of a successful
+        command, are fed into the data without an extra 'getThermostatInfo'.
+        Accepted commands are counted, so a poll that was running meanwhile
+        does not publish the state from before the command.
+        """
+        if not response:
+            return False
+        result = response.get("result")
+        if result is not None and result != "ok":
+            _LOGGER.error("%s: command was not accepted by the Toon: %s",
+                          self.name, response)
+            return False
+        self._writes += 1
+        if self.data is not None:
+            state = dict(expected)
+            state.update(
+                (key, value) for key, value in response.items()
+                if key in PAYLOAD_FIELDS
+            )
+            try:
+                data = ThermostatSnapshot.from_payload(state, self.data)
+            except (TypeError, ValueError) as err:
+                _LOGGER.error("Cannot parse data received from %s: %s",
+                              self.name, err)
+            else:
+                self.async_set_updated_data(data)
+        return True
+
+    async def async_restore(self) -> None:
+        """
+        Restore the stored state of the Toon
+
+        The last known thermostat data is restored as the data of the
+        coordinator, so entities can be added before the Toon answered.
+        """
+        if self._store is None:
+            return
+        stored = await self._store.async_load()
+        if not stored:
+            return
+        self.burner = BurnerStatistics.from_dict(stored.get("burner", {}))
+        if stored.get("snapshot") and self.data is None:
+            try:
+                self.data = ThermostatSnapshot(**stored["snapshot"])
+            except TypeError as err:
+                _LOGGER.warning("%s: cannot restore the last data: %s",
+                                self.name, err)
+
+    @callback
+    def _data_to_store(self) -> Dict[str, Any]:
+        """
+        Return the state of the Toon to be stored
+        """
+        return {
+            "burner": self.burner.as_dict(),
+            "snapshot": None if self.data is None else self.data.as_dict(),
+        }
+
+    async def async_shutdown(self) -> None:
+        """
+        Stop polling and close the connections to the Toon
+        """
+        await super().async_shutdown()
+        await self.api.async_close()
+
+    async def _async_update_data(self) -> Optional[ThermostatSnapshot]:
+        """
+        Update local data with thermostat data, see _async_poll
+        """
+        try:
+            return await self._async_poll()
+        finally:
+            self._polled = True
+
+    async def _async_poll(self) -> Optional[ThermostatSnapshot]:
+        """
+        Poll the thermostat data (Toon 1 and Toon 2)
+
+        When the request fails the previous data is kept, the error has
+        already been logged by the API client. Once the circuit breaker of
+        the client opens the update fails, marking the entities unavailable.
+
+        The extra endpoints are requested together with 'getThermostatInfo'
+        so they are sent back to back over the kept-alive connection. Their
+        previous data is kept as well when they fail. Commands are sent
+        before queued polls, so a command can be applied while the extra
+        endpoints are still pending. The thermostat data of such a poll may
+        predate the command and is dropped, the command already fed its
+        state into the data.
+
+        Every parsed payload is added to the sample history and the burner
+        statistics, before the deadbands are applied. When the statistics
+        or the data changed they are stored with a delay.
+        """
+        data = None
+        writes = self._writes
+        payload, *extras = await asyncio.gather(
+            self.api.async_get_thermostat_info(),
+            *(self.api.async_get_endpoint(*EXTRA_ENDPOINTS[endpoint])
+              for endpoint in self._extra_endpoints),
+        )
+        for endpoint, extra in zip(self._extra_endpoints, extras):
+            if extra:
+                self.extra_data[endpoint] = extra
+        if payload and self._writes != writes:
+            _LOGGER.debug("%s: a command was applied during the poll, "
+                          "dropping its thermostat data", self.name)
+        elif payload:
+            try:
+                data = ThermostatSnapshot.from_payload(payload)
+            except (KeyError, TypeError, ValueError) as err:
+                _LOGGER.error("Cannot parse data received from %s: %s",
+                              self.name, err)
+            else:
+                now = time()
+                self.history.append(now, data)
+                burner_changed = self.burner.update(now, data.burner_info)
+                data = data.with_deadbands(self.data,
+                                           self._temperature_deadband,
+                                           self._modulation_deadband)
+                if self._store is not None and (burner_changed
+                                                or data != self.data):
+                    self._store.async_delay_save(self._data_to_store,
+                                                 STORE_SAVE_DELAY)
+        if self._adaptive_polling:
+            self.update_interval = self._next_update_interval(data)
+            _LOGGER.debug("%s: next poll in %s", self.name,
+                          self.update_interval)
+        if data is None:
+            if not self.api.available:
+                raise UpdateFailed(f"{self.name} is unreachable")
+            return self.data
+        return data
@@ -0,0 +1,127 @@
+"""
+Recent thermostat samples of a Toon.
+
+This module has no Home Assistant dependencies.
+"""
+
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from .const import HISTORY_SIZE
+from .snapshot import ThermostatSnapshot
+
+"""
+Snapshot fields kept for every sample
+"""
+HISTORY_FIELDS = (
+    "current_temperature",
+    "current_setpoint",
+    "burner_info",
+    "modulation_level",
+    "boiler_setpoint",
+)
+
+
+def _value(value: float) -> Optional[float]:
+    """
+    Return a stored value, None when it was unknown
+    """
+    return None if value != value else value
+
+
+class SampleHistory:
+    """
+    Fixed-size ring buffer of timestamped thermostat samples
+
+    Every field is kept in its own array of doubles, a sample is appended
+    in constant time by overwriting the oldest one when the buffer is full.
+    Window queries find their first sample by bisecting the timestamps and
+    aggregate the values of a field over a single slice.
+    """
+
+    def __init__(self, size: int = HISTORY_SIZE) -> None:
+        """
+        Initialize an empty history holding up to size samples
+        """
+        self._size = size
+        self._times = array("d", bytes(8 * size))
+        self._values = {
+            field: array("d", bytes(8 * size)) for field in HISTORY_FIELDS
+        }
+        self._start = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        """
+        Return the number of samples
+        """
+        return self._count
+
+    def append(self, timestamp: float, snapshot: ThermostatSnapshot) -> None:
+        """
+        Add a sample taken at a POSIX timestamp
+        """
+        if self._count < self._size:
+            index = (self._start + self._count) % self._size
+            self._count += 1
+        else:
+            index = self._start
+            self._start = (self._start + 1) % self._size
+        self._times[index] = timestamp
+        for field, values in self._values.items():
+            value = getattr(snapshot, field)
+            values[index] = float("nan") if value is None else value
+
+    def _ordered(self, column: array) -> array:
+        """
+        Return a column from the oldest to the newest sample
+        """
+        end = self._start + self._count
+        if end <= self._size:
+            return column[self._start:end]
+        return column[self._start:] + column[:end - self._size]
+
+    def window(self, since: float) -> Dict[str, Any]:
+        """
+        Return the number of samples since a POSIX timestamp and the
+        minimum, maximum, mean and last value of every field
+        """
+        times = self._ordered(self._times)
+        first = bisect_left(times, since)
+        result: Dict[str, Any] = {"count": len(times) - first}
+        for field, column in self._values.items():
+            values = [
+                value for value in self._ordered(column)[first:]
+                if value == value
+            ]
+            result[field] = {
+                "min": min(values) if values else None,
+                "max": max(values) if values else None,
+                "mean": sum(values) / len(values) if values else None,
+                "last": values[-1] if values else None,
+            }
+        return result
+
+    def samples(self, since: float) -> List[Dict[str, Any]]:
+        """
+        Return the samples since a POSIX timestamp, oldest first
+        """
+        times = self._ordered(self._times)
+        first = bisect_left(times, since)
+        columns = {
+            field: self._ordered(column)[first:]
+            for field, column in self._values.items()
+        }
+        return [
+            {
+                "time": datetime.fromtimestamp(
+                    timestamp, timezone.utc).isoformat(),
+                **{
+                    field: _value(column[index])
+                    for field, column in columns.items()
+                },
+            }
+            for index, timestamp in enumerate(times[first:])
+        ]
@@ -0,0 +1,118 @@
+"""
+Hub managing all configured Toon thermostats.
+
+The hub owns one coordinator per Toon, bounds the number of requests that
+run at the same time over all Toons and staggers their polls so they do
+not all hit the event loop in the same second.
+"""
+
+import asyncio
+from datetime import timedelta
+import logging
+from typing import Any, Dict
+
+from homeassistant.const import (
+    CONF_HOST,
+    CONF_NAME,
+    CONF_PORT,
+    CONF_SCAN_INTERVAL,
+    EVENT_HOMEASSISTANT_STOP,
+)
+from homeassistant.core import HomeAssistant, callback
+
+from .api import ToonApi
+from .const import (
+    CONF_ADAPTIVE_POLLING,
+    CONF_EXTRA_ENDPOINTS,
+    CONF_MODULATION_DEADBAND,
+    CONF_READ_RETRIES,
+    CONF_SETPOINT_DEBOUNCE,
+    CONF_TEMPERATURE_DEADBAND,
+    CONF_WRITE_RETRIES,
+    DATA_TOON_CLIMATE,
+    DEFAULT_SCAN_INTERVAL,
+    INTEGRATION_DOMAIN,
+    MAX_PARALLEL_REQUESTS,
+    STAGGER_STEP,
+)
+from .coordinator import ToonDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@callback
+def async_get_hub(hass: HomeAssistant) -> "ToonHub":
+    """
+    Return the hub, creating it for the first Toon
+    """
+    if DATA_TOON_CLIMATE not in hass.data:
+        hass.data[DATA_TOON_CLIMATE] = ToonHub(hass)
+    return hass.data[DATA_TOON_CLIMATE]
+
+
+class ToonHub:
+    """
+    Registry of the coordinators and climate entities of all Toons
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """
+        Initialize the hub
+        """
+        self.hass = hass
+        self.coordinators: Dict[str, ToonDataUpdateCoordinator] = {}
+        self.entities: Dict[str, Any] = {}
+        self._semaphore = asyncio.Semaphore(MAX_PARALLEL_REQUESTS)
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP,
+                                   self._async_shutdown)
+
+    @staticmethod
+    def key(config) -> str:
+        """
+        Return the key of a Toon configuration
+        """
+        return f"{config.get(CONF_HOST)}:{config.get(CONF_PORT)}"
+
+    @callback
+    def async_get_coordinator(self, config) -> ToonDataUpdateCoordinator:
+        """
+        Return the coordinator shared by all entities of a Toon
+
+        A new coordinator is created for the first configuration block of
+        a host and port combination. Its first scheduled poll is offset
+        within the scan interval to spread the polls of all Toons.
+        """
+        key = self.key(config)
+        if key not in self.coordinators:
+            update_interval = config.get(
+                CONF_SCAN_INTERVAL, timedelta(seconds=DEFAULT_SCAN_INTERVAL)
+            )
+            stagger = (len(self.coordinators) * STAGGER_STEP) % 1
+            api = ToonApi(
+                config.get(CONF_NAME), config.get(CONF_HOST),
+                config.get(CONF_PORT),
+                setpoint_debounce=config.get(CONF_SETPOINT_DEBOUNCE),
+                semaphore=self._semaphore,
+                read_retries=config.get(CONF_READ_RETRIES),
+                write_retries=config.get(CONF_WRITE_RETRIES),
+            )
+            self.coordinators[key] = ToonDataUpdateCoordinator(
+                self.hass, api, update_interval,
+                config.get(CONF_ADAPTIVE_POLLING),
+                config.get(CONF_TEMPERATURE_DEADBAND),
+                config.get(CONF_MODULATION_DEADBAND),
+                stagger_offset=update_interval * stagger,
+                extra_endpoints=config.get(CONF_EXTRA_ENDPOINTS, []),
+                storage_key=(f"{INTEGRATION_DOMAIN}.{config.get(CONF_HOST)}"
+                             f"_{config.get(CONF_PORT)}"),
+            )
+        return self.coordinators[key]
+
+    async def _async_shutdown(self, event) -> None:
+        """
+        Stop polling and close the connection pools of all Toons
+        """
+        await asyncio.gather(
+            *(coordinator.async_shutdown()
+              for coordinator in self.coordinators.values())
+        )
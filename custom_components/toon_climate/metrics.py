@@ -0,0 +1,95 @@
+"""
+Request instrumentation for the Toon API client.
+
+This module has no Home Assistant dependencies.
+"""
+
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional
+
+"""
+Upper bounds in milliseconds of the latency histogram buckets, the last
+bucket counts everything slower
+"""
+LATENCY_BUCKETS = (25, 50, 100, 250, 500, 1000, 2500, 5000)
+LATENCY_WINDOW = 100
+
+RESULT_SUCCESS = "success"
+RESULT_TIMEOUT = "timeout"
+RESULT_CONNECTION_ERROR = "connection_error"
+RESULT_PARSE_ERROR = "parse_error"
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """
+    Return a percentile of the values, None when there are none
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class RequestMetrics:
+    """
+    Latency histogram and result counters of the requests to a Toon
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize empty metrics
+        """
+        self.histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.counters = {
+            RESULT_SUCCESS: 0,
+            RESULT_TIMEOUT: 0,
+            RESULT_CONNECTION_ERROR: 0,
+            RESULT_PARSE_ERROR: 0,
+        }
+        self.last_latency: Optional[float] = None
+        self.last_success: Optional[datetime] = None
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    def record(self, result: str, latency: float) -> None:
+        """
+        Record the result and latency in seconds of a request
+        """
+        self.counters[result] += 1
+        milliseconds = latency * 1000
+        self.last_latency = milliseconds
+        self.histogram[bisect_left(LATENCY_BUCKETS, milliseconds)] += 1
+        self._latencies.append(milliseconds)
+        if result == RESULT_SUCCESS:
+            self.last_success = datetime.now(timezone.utc)
+
+    @property
+    def errors(self) -> int:
+        """
+        Return the number of failed requests
+        """
+        return sum(self.counters.values()) - self.counters[RESULT_SUCCESS]
+
+    def latency_percentile(self, fraction: float) -> Optional[float]:
+        """
+        Return a percentile in milliseconds of the recent latencies
+        """
+        return percentile(list(self._latencies), fraction)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Return the metrics for diagnostics
+        """
+        buckets = [f"<={bound}ms" for bound in LATENCY_BUCKETS]
+        buckets.append(f">{LATENCY_BUCKETS[-1]}ms")
+        return {
+            **self.counters,
+            "errors": self.errors,
+            "last_latency_ms": self.last_latency,
+            "latency_p50_ms": self.latency_percentile(0.5),
+            "latency_p99_ms": self.latency_percentile(0.99),
+            "latency_histogram": dict(zip(buckets, self.histogram)),
+            "last_success": (self.last_success.isoformat()
+                             if self.last_success else None),
+        }
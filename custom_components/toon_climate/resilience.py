@@ -0,0 +1,165 @@
+"""
+Failure handling for the Toon API client.
+
+This module has no Home Assistant dependencies.
+"""
+
+from collections import deque
+import random
+from time import monotonic
+from typing import Deque, Optional
+
+from .const import (
+    ADAPTIVE_TIMEOUT_FACTOR,
+    ADAPTIVE_TIMEOUT_MIN,
+    ADAPTIVE_TIMEOUT_SAMPLES,
+    ADAPTIVE_TIMEOUT_WINDOW,
+    BREAKER_BASE_BACKOFF,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_JITTER,
+    BREAKER_MAX_BACKOFF,
+    REQUEST_TIMEOUT,
+)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for the requests to a single Toon
+
+    After a number of consecutive failures the breaker opens and requests
+    are rejected without contacting the Toon. After a backoff that doubles
+    with every failed probe (with random jitter) a single probe request is
+    let through (half open); its success closes the breaker again.
+    """
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 base_backoff: float = BREAKER_BASE_BACKOFF,
+                 max_backoff: float = BREAKER_MAX_BACKOFF,
+                 jitter: float = BREAKER_JITTER,
+                 rng: Optional[random.Random] = None) -> None:
+        """
+        Initialize a closed circuit breaker
+        """
+        self._failure_threshold = failure_threshold
+        self._base_backoff = base_backoff
+        self._max_backoff = max_backoff
+        self._jitter = jitter
+        self._rng = rng or random.Random()
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self._opened = 0
+        self._retry_at = 0.0
+
+    @property
+    def closed(self) -> bool:
+        """
+        Return whether requests pass normally
+        """
+        return self.state == STATE_CLOSED
+
+    @property
+    def retry_in(self) -> float:
+        """
+        Return the seconds until the next probe is allowed
+        """
+        return max(0.0, self._retry_at - monotonic())
+
+    def allow_request(self) -> bool:
+        """
+        Return whether a request may be sent now
+
+        When the backoff has passed the breaker turns half open and allows
+        exactly one probe request.
+        """
+        if self.state == STATE_CLOSED:
+            return True
+        if self.state == STATE_OPEN and monotonic() >= self._retry_at:
+            self.state = STATE_HALF_OPEN
+            return True
+        return False
+
+    def record_success(self) -> bool:
+        """
+        Record a successful request, returns True when the breaker closed
+        """
+        was_closed = self.closed
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self._opened = 0
+        return not was_closed
+
+    def record_failure(self) -> bool:
+        """
+        Record a failed request, returns True when the breaker opened
+        """
+        self.failures += 1
+        if (self.state != STATE_HALF_OPEN
+                and self.failures < self._failure_threshold):
+            return False
+
+        backoff = min(self._max_backoff,
+                      self._base_backoff * 2 ** self._opened)
+        backoff *= 1 + self._rng.uniform(-self._jitter, self._jitter)
+        self._opened += 1
+        was_open = self.state != STATE_CLOSED
+        self.state = STATE_OPEN
+        self._retry_at = monotonic() + backoff
+        return not was_open
+
+
+class AdaptiveTimeout:
+    """
+    Request timeout derived from the recently observed latencies
+
+    The timeout is the p99 latency times a factor, clamped between a
+    minimum and the maximum. Fast Toons fail fast while slow Toons are not
+    timed out falsely.
+    """
+
+    def __init__(self, factor: float = ADAPTIVE_TIMEOUT_FACTOR,
+                 minimum: float = ADAPTIVE_TIMEOUT_MIN,
+                 maximum: float = REQUEST_TIMEOUT,
+                 min_samples: int = ADAPTIVE_TIMEOUT_SAMPLES,
+                 window: int = ADAPTIVE_TIMEOUT_WINDOW) -> None:
+        """
+        Initialize without observed latencies
+        """
+        self._factor = factor
+        self._minimum = minimum
+        self._maximum = maximum
+        self._min_samples = min_samples
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._timeout = maximum
+
+    @property
+    def timeout(self) -> float:
+        """
+        Return the timeout in seconds for the next request
+        """
+        return self._timeout
+
+    def record(self, latency: float) -> None:
+        """
+        Record the latency in seconds of a successful request
+        """
+        self._latencies.append(latency)
+        if len(self._latencies) < self._min_samples:
+            return
+        ordered = sorted(self._latencies)
+        p99 = ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))]
+        self._timeout = min(self._maximum,
+                            max(self._minimum, p99 * self._factor))
+
+    def record_timeout(self) -> None:
+        """
+        Record a timed out request
+
+        The timeout may have been too tight, so it is doubled (up to the
+        maximum) until new latencies are known.
+        """
+        self._latencies.clear()
+        self._timeout = min(self._maximum, self._timeout * 2)
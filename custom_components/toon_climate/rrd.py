@@ -0,0 +1,86 @@
+"""
+Conversion of the round-robin history kept on the Toon into hourly
+statistics.
+
+This module has no Home Assistant dependencies.
+"""
+
+from itertools import groupby
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+HOUR = 3600
+
+Point = Tuple[int, float]
+
+
+def parse_rrd(data: Dict[str, Any], scale: float = 1) -> List[Point]:
+    """
+    Return the points of a 'getRrdData' response, oldest first
+
+    The response maps POSIX timestamps to values, points without a value
+    (including the NaN of an unknown value) are skipped.
+    """
+    points = []
+    for timestamp, value in data.items():
+        try:
+            point = (int(timestamp), float(value) * scale)
+        except (TypeError, ValueError):
+            continue
+        if point[1] == point[1]:
+            points.append(point)
+    points.sort()
+    return points
+
+
+def _hours(points: Iterable[Point]) -> Iterator[Tuple[int, List[float]]]:
+    """
+    Group the points by the hour they fall in
+    """
+    for hour, group in groupby(points, key=lambda point: point[0]
+                               - point[0] % HOUR):
+        yield hour, [value for _, value in group]
+
+
+def hourly_means(points: Iterable[Point], after: Optional[float],
+                 before: float) -> List[Dict[str, float]]:
+    """
+    Return the mean, minimum and maximum of every complete hour that starts
+    after the given timestamp (the last imported hour)
+    """
+    return [
+        {
+            "start": hour,
+            "mean": sum(values) / len(values),
+            "min": min(values),
+            "max": max(values),
+        }
+        for hour, values in _hours(points)
+        if (after is None or hour > after) and hour + HOUR <= before
+    ]
+
+
+def hourly_sums(points: Iterable[Point], after: Optional[float],
+                before: float, last_sum: float = 0
+                ) -> List[Dict[str, float]]:
+    """
+    Return the meter reading and the growing sum of every complete hour
+    that starts after the given timestamp (the last imported hour)
+
+    The sum continues from the last imported sum. A reading lower than the
+    previous one (a replaced meter) restarts the counting from it.
+    """
+    rows = []
+    state = None
+    total = last_sum
+    for hour, values in _hours(points):
+        if hour + HOUR > before:
+            break
+        reading = values[-1]
+        if after is not None and hour <= after:
+            state = reading
+            continue
+        if state is not None and reading >= state:
+            total += reading - state
+        state = reading
+        rows.append({"start": hour, "state": reading, "sum": total})
+    return rows
@@ -0,0 +1,89 @@
+"""
+Request scheduling for a single Toon.
+
+This module has no Home Assistant dependencies.
+"""
+
+import asyncio
+from heapq import heappop, heappush
+from itertools import count
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+PRIORITY_WRITE = 0
+PRIORITY_READ = 1
+PRIORITY_BACKGROUND = 2
+
+
+class RequestScheduler:
+    """
+    Run the requests to a single Toon one at a time
+
+    The web server of the Toon handles requests in arbitrary order when
+    they arrive concurrently. Requests are queued and sent one by one,
+    commands before polls, so a poll queued when a command arrives reports
+    the state after the command. Background requests are sent last. An
+    identical request that is still queued is not sent twice, its callers
+    share the response.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize an idle scheduler
+        """
+        self._queue: List[Tuple[int, int, str]] = []
+        self._jobs: Dict[
+            str, Tuple[Callable[[], Awaitable[Any]], asyncio.Future]
+        ] = {}
+        self._sequence = count()
+        self._worker: Optional[asyncio.Task] = None
+        self.collapsed = 0
+
+    @property
+    def pending(self) -> int:
+        """
+        Return the number of queued requests
+        """
+        return len(self._queue)
+
+    async def async_run(self, key: str,
+                        request: Callable[[], Awaitable[Any]],
+                        priority: int = PRIORITY_READ) -> Any:
+        """
+        Queue a request and return its result once it ran
+
+        Requests with the same key that are queued but not yet sent are
+        collapsed into one.
+        """
+        job = self._jobs.get(key)
+        if job is None:
+            loop = asyncio.get_running_loop()
+            job = self._jobs[key] = (request, loop.create_future())
+            heappush(self._queue, (priority, next(self._sequence), key))
+            if self._worker is None:
+                self._worker = loop.create_task(self._async_work())
+        else:
+            self.collapsed += 1
+        return await asyncio.shield(job[1])
+
+    async def _async_work(self) -> None:
+        """
+        Run the queued requests in order of priority
+        """
+        try:
+            while self._queue:
+                _, _, key = heappop(self._queue)
+                request, future = self._jobs.pop(key)
+                try:
+                    result = await request()
+                except Exception as err:  # pylint: disable=broad-except
+                    if not future.done():
+                        future.set_exception(err)
+                else:
+                    if not future.done():
+                        future.set_result(result)
+        finally:
+            for _, future in self._jobs.values():
+                future.cancel()
+            self._jobs.clear()
+            self._queue.clear()
+            self._worker = None
@@ -0,0 +1,412 @@
+"""
+Sensor support for Toon thermostat.
+
+The sensors are created for every configured Toon by the climate platform
+and share its coordinator, they need no configuration of their own. The
+sensors of the extra endpoints are only created when the endpoint is
+configured.
+"""
+
+from dataclasses import dataclass
+import logging
+from time import time
+from typing import Any, Callable, Dict, Optional
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.const import (
+    CONCENTRATION_PARTS_PER_BILLION,
+    CONCENTRATION_PARTS_PER_MILLION,
+    CONF_HOST,
+    CONF_NAME,
+    CONF_PORT,
+    PERCENTAGE,
+    EntityCategory,
+    UnitOfPower,
+    UnitOfPressure,
+    UnitOfTemperature,
+    UnitOfTime,
+)
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import (
+    CONF_EXTRA_ENDPOINTS,
+    ENDPOINT_BOILER,
+    ENDPOINT_POWER_USAGE,
+    ENDPOINT_SENSORS,
+    INTEGRATION_DOMAIN,
+)
+from .coordinator import ToonDataUpdateCoordinator
+from .hub import async_get_hub
+from .metrics import (
+    RESULT_CONNECTION_ERROR,
+    RESULT_PARSE_ERROR,
+    RESULT_SUCCESS,
+    RESULT_TIMEOUT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, kw_only=True)
+class ToonSensorEntityDescription(SensorEntityDescription):
+    """
+    Description of a Toon sensor
+    """
+
+    value_fn: Callable[[ToonDataUpdateCoordinator], Any]
+    attributes_fn: Optional[
+        Callable[[ToonDataUpdateCoordinator], Dict[str, Any]]
+    ] = None
+    always_available: bool = False
+    endpoint: Optional[str] = None
+
+
+"""
+Names of the Toon burnerInfo values
+"""
+BURNER_STATES = {0: "off", 1: "heating", 2: "hot_water", 3: "preheating"}
+
+
+def _endpoint_value(endpoint: str, *keys: str
+                    ) -> Callable[[ToonDataUpdateCoordinator], Any]:
+    """
+    Return a function reading a numeric value from the data of an endpoint
+    """
+    def value(coordinator: ToonDataUpdateCoordinator) -> Optional[float]:
+        data: Any = coordinator.extra_data.get(endpoint, {})
+        for key in keys:
+            if not isinstance(data, dict):
+                return None
+            data = data.get(key)
+        try:
+            return float(data)
+        except (TypeError, ValueError):
+            return None
+    return value
+
+
+def _snapshot_value(field: str) -> Callable[[ToonDataUpdateCoordinator], Any]:
+    """
+    Return a function reading a field of the thermostat snapshot
+    """
+    def value(coordinator: ToonDataUpdateCoordinator) -> Any:
+        if coordinator.data is None:
+            return None
+        return getattr(coordinator.data, field)
+    return value
+
+
+SENSOR_TYPES = (
+    ToonSensorEntityDescription(
+        key="request_latency",
+        name="Request latency",
+        icon="mdi:timer-outline",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        always_available=True,
+        value_fn=lambda coordinator: coordinator.api.metrics.last_latency,
+        attributes_fn=lambda coordinator: {
+            "latency_p50_ms": coordinator.api.metrics.latency_percentile(0.5),
+            "latency_p99_ms": coordinator.api.metrics.latency_percentile(0.99),
+            "latency_histogram":
+                coordinator.api.metrics.as_dict()["latency_histogram"],
+            "read_timeout": coordinator.api.read_timeout.timeout,
+            "write_timeout": coordinator.api.write_timeout.timeout,
+            "requests_collapsed": coordinator.api.scheduler.collapsed,
+            **coordinator.api.connection_stats,
+        },
+    ),
+    ToonSensorEntityDescription(
+        key="request_errors",
+        name="Request errors",
+        icon="mdi:alert-circle-outline",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        always_available=True,
+        value_fn=lambda coordinator: coordinator.api.metrics.errors,
+        attributes_fn=lambda coordinator: dict(
+            coordinator.api.metrics.counters
+        ),
+    ),
+    ToonSensorEntityDescription(
+        key="last_success",
+        name="Last successful request",
+        device_class=SensorDeviceClass.TIMESTAMP,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        always_available=True,
+        value_fn=lambda coordinator: coordinator.api.metrics.last_success,
+    ),
+    ToonSensorEntityDescription(
+        key="modulation_level",
+        name="Modulation level",
+        icon="mdi:fire",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=_snapshot_value("modulation_level"),
+    ),
+    ToonSensorEntityDescription(
+        key="boiler_setpoint",
+        name="Boiler setpoint",
+        device_class=SensorDeviceClass.TEMPERATURE,
+        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=_snapshot_value("boiler_setpoint"),
+    ),
+    ToonSensorEntityDescription(
+        key="burner_state",
+        name="Burner state",
+        icon="mdi:water-boiler",
+        device_class=SensorDeviceClass.ENUM,
+        options=list(BURNER_STATES.values()),
+        value_fn=lambda coordinator: BURNER_STATES.get(
+            _snapshot_value("burner_info")(coordinator)),
+    ),
+    ToonSensorEntityDescription(
+        key="burner_cycles_hour",
+        name="Burner cycles last hour",
+        icon="mdi:fire-circle",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda coordinator:
+            coordinator.burner.cycles_per_hour(time()),
+    ),
+    ToonSensorEntityDescription(
+        key="burner_cycles_day",
+        name="Burner cycles last day",
+        icon="mdi:fire-circle",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda coordinator: coordinator.burner.cycles_per_day(time()),
+    ),
+    ToonSensorEntityDescription(
+        key="heating_cycles",
+        name="Heating cycles",
+        icon="mdi:fire",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda coordinator: coordinator.burner.heating_cycles,
+    ),
+    ToonSensorEntityDescription(
+        key="hot_water_cycles",
+        name="Hot water cycles",
+        icon="mdi:water-boiler",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda coordinator: coordinator.burner.hot_water_cycles,
+    ),
+    ToonSensorEntityDescription(
+        key="short_cycles",
+        name="Short cycles",
+        icon="mdi:fire-alert",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda coordinator: coordinator.burner.short_cycles,
+    ),
+    ToonSensorEntityDescription(
+        key="heating_runtime",
+        name="Heating runtime",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.HOURS,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        suggested_display_precision=2,
+        value_fn=lambda coordinator: coordinator.burner.heating_runtime / 3600,
+    ),
+    ToonSensorEntityDescription(
+        key="hot_water_runtime",
+        name="Hot water runtime",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.HOURS,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        suggested_display_precision=2,
+        value_fn=lambda coordinator:
+            coordinator.burner.hot_water_runtime / 3600,
+    ),
+    ToonSensorEntityDescription(
+        key="temperature",
+        name="Temperature",
+        device_class=SensorDeviceClass.TEMPERATURE,
+        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        state_class=SensorStateClass.MEASUREMENT,
+        endpoint=ENDPOINT_SENSORS,
+        value_fn=_endpoint_value(ENDPOINT_SENSORS, "temperature"),
+    ),
+    ToonSensorEntityDescription(
+        key="humidity",
+        name="Humidity",
+        device_class=SensorDeviceClass.HUMIDITY,
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        endpoint=ENDPOINT_SENSORS,
+        value_fn=_endpoint_value(ENDPOINT_SENSORS, "humidity"),
+    ),
+    ToonSensorEntityDescription(
+        key="tvoc",
+        name="TVOC",
+        device_class=SensorDeviceClass.VOLATILE_ORGANIC_COMPOUNDS_PARTS,
+        native_unit_of_measurement=CONCENTRATION_PARTS_PER_BILLION,
+        state_class=SensorStateClass.MEASUREMENT,
+        endpoint=ENDPOINT_SENSORS,
+        value_fn=_endpoint_value(ENDPOINT_SENSORS, "tvoc"),
+    ),
+    ToonSensorEntityDescription(
+        key="eco2",
+        name="eCO2",
+        device_class=SensorDeviceClass.CO2,
+        native_unit_of_measurement=CONCENTRATION_PARTS_PER_MILLION,
+        state_class=SensorStateClass.MEASUREMENT,
+        endpoint=ENDPOINT_SENSORS,
+        value_fn=_endpoint_value(ENDPOINT_SENSORS, "eco2"),
+    ),
+    ToonSensorEntityDescription(
+        key="boiler_pressure",
+        name="Boiler pressure",
+        device_class=SensorDeviceClass.PRESSURE,
+        native_unit_of_measurement=UnitOfPressure.BAR,
+        state_class=SensorStateClass.MEASUREMENT,
+        endpoint=ENDPOINT_BOILER,
+        value_fn=_endpoint_value(ENDPOINT_BOILER, "boilerPressure"),
+    ),
+    ToonSensorEntityDescription(
+        key="boiler_in_temperature",
+        name="Boiler in temperature",
+        device_class=SensorDeviceClass.TEMPERATURE,
+        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        state_class=SensorStateClass.MEASUREMENT,
+        endpoint=ENDPOINT_BOILER,
+        value_fn=_endpoint_value(ENDPOINT_BOILER, "boilerInTemp"),
+    ),
+    ToonSensorEntityDescription(
+        key="boiler_out_temperature",
+        name="Boiler out temperature",
+        device_class=SensorDeviceClass.TEMPERATURE,
+        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        state_class=SensorStateClass.MEASUREMENT,
+        endpoint=ENDPOINT_BOILER,
+        value_fn=_endpoint_value(ENDPOINT_BOILER, "boilerOutTemp"),
+    ),
+    ToonSensorEntityDescription(
+        key="power_usage",
+        name="Power usage",
+        device_class=SensorDeviceClass.POWER,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        state_class=SensorStateClass.MEASUREMENT,
+        endpoint=ENDPOINT_POWER_USAGE,
+        value_fn=_endpoint_value(ENDPOINT_POWER_USAGE, "powerUsage", "value"),
+        attributes_fn=lambda coordinator: coordinator.extra_data.get(
+            ENDPOINT_POWER_USAGE, {}).get("powerUsage"),
+    ),
+    ToonSensorEntityDescription(
+        key="power_production",
+        name="Power production",
+        device_class=SensorDeviceClass.POWER,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        state_class=SensorStateClass.MEASUREMENT,
+        endpoint=ENDPOINT_POWER_USAGE,
+        value_fn=_endpoint_value(ENDPOINT_POWER_USAGE, "powerProduction",
+                                 "value"),
+        attributes_fn=lambda coordinator: coordinator.extra_data.get(
+            ENDPOINT_POWER_USAGE, {}).get("powerProduction"),
+    ),
+    ToonSensorEntityDescription(
+        key="gas_usage",
+        name="Gas usage",
+        icon="mdi:fire",
+        state_class=SensorStateClass.MEASUREMENT,
+        endpoint=ENDPOINT_POWER_USAGE,
+        value_fn=_endpoint_value(ENDPOINT_POWER_USAGE, "gasUsage", "value"),
+        attributes_fn=lambda coordinator: coordinator.extra_data.get(
+            ENDPOINT_POWER_USAGE, {}).get("gasUsage"),
+    ),
+)
+
+
+async def async_setup_platform(hass, config, add_devices, discovery_info=None):
+    """
+    Setup the sensors of a Toon discovered by the climate platform
+    """
+    if discovery_info is None:
+        return
+
+    hub = async_get_hub(hass)
+    coordinator = hub.coordinators[hub.key(discovery_info)]
+    endpoints = discovery_info.get(CONF_EXTRA_ENDPOINTS) or []
+    add_devices(
+        ToonSensor(coordinator, discovery_info, description)
+        for description in SENSOR_TYPES
+        if description.endpoint is None or description.endpoint in endpoints
+    )
+
+
+class ToonSensor(CoordinatorEntity, SensorEntity):
+    """
+    Representation of a Toon sensor
+    """
+
+    entity_description: ToonSensorEntityDescription
+
+    """
+    Request metrics that change with every poll, shown as attributes but
+    not recorded
+    """
+    _unrecorded_attributes = frozenset({
+        "latency_p50_ms",
+        "latency_p99_ms",
+        "latency_histogram",
+        "read_timeout",
+        "write_timeout",
+        "requests_collapsed",
+        "connections_created",
+        "connections_reused",
+        RESULT_SUCCESS,
+        RESULT_TIMEOUT,
+        RESULT_CONNECTION_ERROR,
+        RESULT_PARSE_ERROR,
+    })
+
+    def __init__(self, coordinator: ToonDataUpdateCoordinator, config,
+                 description: ToonSensorEntityDescription) -> None:
+        """
+        Initialize the Toon sensor
+        """
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._attr_name = f"{config[CONF_NAME]} {description.name}"
+        self._attr_unique_id = (
+            f"{INTEGRATION_DOMAIN}_{config[CONF_HOST]}_{config[CONF_PORT]}"
+            f"_{description.key}"
+        )
+
+    @property
+    def available(self) -> bool:
+        """
+        Return if the sensor is available, the request metrics also are
+        when the Toon is not, the sensors of an endpoint only once it
+        returned data
+        """
+        description = self.entity_description
+        if description.always_available:
+            return True
+        return super().available and (
+            description.endpoint is None
+            or description.endpoint in self.coordinator.extra_data
+        )
+
+    @property
+    def native_value(self) -> Any:
+        """
+        Return the state of the sensor
+        """
+        return self.entity_description.value_fn(self.coordinator)
+
+    @property
+    def extra_state_attributes(self) -> Optional[Dict[str, Any]]:
+        """
+        Return additional details of the sensor
+        """
+        if self.entity_description.attributes_fn is None:
+            return None
+        return self.entity_description.attributes_fn(self.coordinator)
@@ -0,0 +1,175 @@
+"""
+Parsed state of a Toon thermostat.
+
+This module has no Home Assistant dependencies.
+"""
+
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def _hundredths(value: Any) -> float:
+    """
+    Convert a value in hundredths of a degree to degrees
+    """
+    return int(value) / 100
+
+
+"""
+Keys of the 'getThermostatInfo' payload, the snapshot fields they are
+parsed into and their converters. The Toon reports all values as strings,
+temperatures in hundredths of a degree.
+"""
+PAYLOAD_SCHEMA: Tuple[Tuple[str, str, Callable[[Any], Any]], ...] = (
+    ("activeState", "active_state", int),
+    ("burnerInfo", "burner_info", int),
+    ("currentModulationLevel", "modulation_level", int),
+    ("currentSetpoint", "current_setpoint", _hundredths),
+    ("currentTemp", "current_temperature", _hundredths),
+    ("otCommError", "ot_comm_error", int),
+    ("programState", "program_state", int),
+    ("currentInternalBoilerSetpoint", "boiler_setpoint", int),
+)
+PAYLOAD_FIELDS = {key: field for key, field, _ in PAYLOAD_SCHEMA}
+
+
+class ThermostatSnapshot:
+    """
+    Immutable snapshot of the thermostat state
+
+    Fields that are not known are None.
+    """
+
+    __slots__ = tuple(field for _, field, _ in PAYLOAD_SCHEMA)
+
+    def __init__(self, **values: Any) -> None:
+        """
+        Initialize the snapshot from field values
+        """
+        for field in self.__slots__:
+            object.__setattr__(self, field, values.pop(field, None))
+        if values:
+            raise TypeError(f"Unknown snapshot fields: {', '.join(values)}")
+
+    @classmethod
+    def from_payload(cls, data: Dict[str, Any],
+                     base: Optional["ThermostatSnapshot"] = None
+                     ) -> "ThermostatSnapshot":
+        """
+        Parse a 'getThermostatInfo' payload
+
+        Without a base snapshot all keys are required. With a base snapshot
+        the keys present in the (partial) payload replace its values. The
+        payload is converted in a single pass over the schema.
+        """
+        snapshot = object.__new__(cls)
+        if base is None:
+            for key, field, convert in PAYLOAD_SCHEMA:
+                object.__setattr__(snapshot, field, convert(data[key]))
+        else:
+            for key, field, convert in PAYLOAD_SCHEMA:
+                object.__setattr__(
+                    snapshot, field,
+                    convert(data[key]) if key in data
+                    else getattr(base, field),
+                )
+        return snapshot
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """
+        Snapshots are immutable
+        """
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        """
+        Snapshots are immutable
+        """
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def _values(self) -> Tuple[Any, ...]:
+        """
+        Return the field values in slot order
+        """
+        return tuple(getattr(self, field) for field in self.__slots__)
+
+    def __eq__(self, other: object) -> bool:
+        """
+        Return whether both snapshots hold the same values
+        """
+        if not isinstance(other, ThermostatSnapshot):
+            return NotImplemented
+        return self._values() == other._values()
+
+    def __hash__(self) -> int:
+        """
+        Return the hash of the field values
+        """
+        return hash(self._values())
+
+    def __repr__(self) -> str:
+        """
+        Return the representation of the snapshot
+        """
+        fields = ", ".join(
+            f"{field}={getattr(self, field)!r}" for field in self.__slots__
+        )
+        return f"{type(self).__name__}({fields})"
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Return the field values as a dictionary
+        """
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def replace(self, **changes: Any) -> "ThermostatSnapshot":
+        """
+        Return a copy with the given fields replaced
+        """
+        values = self.as_dict()
+        values.update(changes)
+        return ThermostatSnapshot(**values)
+
+    def with_deadbands(self, previous: Optional["ThermostatSnapshot"],
+                       temperature_deadband: float = 0,
+                       modulation_deadband: int = 0
+                       ) -> "ThermostatSnapshot":
+        """
+        Return the snapshot with the previous temperature and modulation
+        level kept while the new values stay within their deadband
+
+        Temperatures are compared in hundredths of a degree, as the Toon
+        reports them, so float rounding cannot move a change across the
+        deadband. The modulation level always follows the burner turning
+        on or off. Values missing from the previous snapshot, like a
+        partly restored one, are taken as they are.
+        """
+        if previous is None:
+            return self
+        changes = {}
+        if (temperature_deadband
+                and previous.current_temperature is not None
+                and abs(round(self.current_temperature * 100)
+                        - round(previous.current_temperature * 100))
+                < round(temperature_deadband * 100)):
+            changes["current_temperature"] = previous.current_temperature
+        if (modulation_deadband
+                and previous.modulation_level is not None
+                and abs(self.modulation_level - previous.modulation_level)
+                < modulation_deadband
+                and self.modulation_level != 0
+                and previous.modulation_level != 0):
+            changes["modulation_level"] = previous.modulation_level
+        if not changes:
+            return self
+        return self.replace(**changes)
+
+    def diff(self, other: Optional["ThermostatSnapshot"]) -> Tuple[str, ...]:
+        """
+        Return the names of the fields that differ from another snapshot
+        """
+        if other is None:
+            return self.__slots__
+        return tuple(
+            field for field in self.__slots__
+            if getattr(self, field) != getattr(other, field)
+        )
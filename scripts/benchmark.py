@@ -0,0 +1,283 @@
+"""
+Benchmark polling throughput and event loop latency against simulated Toons.
+
+Starts the simulator from toon_simulator.py and polls the simulated Toons
+with the ToonApi client and ThermostatSnapshot parser of the integration,
+in two designs:
+
+- timers:      every entity polls its Toon on its own aligned timer over
+               one shared session, like the platform did before the
+               coordinator was introduced
+- coordinated: one staggered poll per Toon whose snapshot is fanned out to
+               all entities of that Toon, requests bounded by a shared
+               semaphore like the hub does
+
+Reported per design: successful requests per second, p50/p99 latency of a
+poll (request and parse), event loop lag (how late a 10 ms timer fires)
+and memory per entity.
+
+    python scripts/benchmark.py --devices 100 --entities 3 --duration 20
+
+Home Assistant is not needed, the coordinator scheduling is mirrored here.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+from toon_simulator import ToonSimulator  # noqa: E402
+
+from custom_components.toon_climate.api import ToonApi  # noqa: E402
+from custom_components.toon_climate.const import (  # noqa: E402
+    MAX_PARALLEL_REQUESTS,
+    STAGGER_STEP,
+)
+from custom_components.toon_climate.snapshot import (  # noqa: E402
+    ThermostatSnapshot,
+)
+
+LAG_PROBE_INTERVAL = 0.01
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """
+    Return a percentile of the values, 0 when there are none
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Entity:
+    """
+    Minimal stand-in for an entity keeping the latest snapshot
+    """
+
+    __slots__ = ("snapshot",)
+
+    def __init__(self) -> None:
+        """
+        Initialize without data
+        """
+        self.snapshot = None
+
+
+class Run:
+    """
+    Measurements of one benchmark run
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize empty measurements
+        """
+        self.latencies: List[float] = []
+        self.lags: List[float] = []
+        self.requests = 0
+        self.failures = 0
+
+    async def poll(self, api: ToonApi) -> ThermostatSnapshot:
+        """
+        Poll a Toon and parse the payload, recording the latency
+        """
+        start = time.perf_counter()
+        payload = await api.async_get_thermostat_info()
+        snapshot = None
+        if payload:
+            snapshot = ThermostatSnapshot.from_payload(payload)
+            self.requests += 1
+        else:
+            self.failures += 1
+        self.latencies.append(time.perf_counter() - start)
+        return snapshot
+
+    async def probe_lag(self, stop: asyncio.Event) -> None:
+        """
+        Record how late a short timer fires while polling runs
+        """
+        loop = asyncio.get_running_loop()
+        while not stop.is_set():
+            start = loop.time()
+            await asyncio.sleep(LAG_PROBE_INTERVAL)
+            self.lags.append(loop.time() - start - LAG_PROBE_INTERVAL)
+
+
+async def _poll_forever(interval: float, offset: float,
+                        poll: Callable[[], Any]) -> None:
+    """
+    Call poll every interval, starting after offset
+    """
+    await asyncio.sleep(offset)
+    while True:
+        await poll()
+        await asyncio.sleep(interval)
+
+
+def _create(design: str, simulator: ToonSimulator, entities: int
+            ) -> Tuple[List[Any], Optional[aiohttp.ClientSession]]:
+    """
+    Create the clients and entities of a design
+
+    The entities of the timers design share one session, like the shared
+    session of Home Assistant the platform used before. Returns the
+    devices and that session.
+    """
+    semaphore = (asyncio.Semaphore(MAX_PARALLEL_REQUESTS)
+                 if design == "coordinated" else None)
+    session = aiohttp.ClientSession() if design == "timers" else None
+    devices = []
+    for port in simulator.ports:
+        if design == "timers":
+            apis = [ToonApi(f"toon_{port}_{index}", simulator.host, port,
+                            setpoint_debounce=0, session=session)
+                    for index in range(entities)]
+        else:
+            apis = [ToonApi(f"toon_{port}", simulator.host, port,
+                            setpoint_debounce=0, semaphore=semaphore)]
+        devices.append((apis, [Entity() for _ in range(entities)]))
+    return devices, session
+
+
+async def async_run(design: str, simulator: ToonSimulator, entities: int,
+                    interval: float, duration: float) -> Dict[str, Any]:
+    """
+    Run one design for the given duration and return its results
+
+    The memory still allocated at the end of the run, before the clients
+    are closed, counts for the entities: the clients, connection pools and
+    buffers. The measurements of this script are left out.
+    """
+    run = Run()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    devices, session = _create(design, simulator, entities)
+
+    tasks = []
+    for index, (apis, device_entities) in enumerate(devices):
+        if design == "timers":
+            for api, entity in zip(apis, device_entities):
+                async def poll(api=api, entity=entity) -> None:
+                    entity.snapshot = await run.poll(api) or entity.snapshot
+                tasks.append(asyncio.ensure_future(
+                    _poll_forever(interval, 0, poll)))
+        else:
+            async def poll(api=apis[0], device_entities=device_entities
+                           ) -> None:
+                snapshot = await run.poll(api)
+                if snapshot is not None:
+                    for entity in device_entities:
+                        entity.snapshot = snapshot
+            offset = interval * ((index * STAGGER_STEP) % 1)
+            tasks.append(asyncio.ensure_future(
+                _poll_forever(interval, offset, poll)))
+
+    stop = asyncio.Event()
+    probe = asyncio.ensure_future(run.probe_lag(stop))
+    await asyncio.sleep(duration)
+    stop.set()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(probe, *tasks, return_exceptions=True)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    memory = sum(
+        stat.size_diff for stat in after.compare_to(before, "filename")
+        if stat.traceback[0].filename != __file__
+    )
+    for apis, _ in devices:
+        for api in apis:
+            await api.async_close()
+    if session is not None:
+        await session.close()
+
+    entity_count = len(devices) * entities
+    return {
+        "design": design,
+        "entities": entity_count,
+        "requests_per_second": run.requests / duration,
+        "failures": run.failures,
+        "poll_p50_ms": percentile(run.latencies, 0.5) * 1000,
+        "poll_p99_ms": percentile(run.latencies, 0.99) * 1000,
+        "loop_lag_p99_ms": percentile(run.lags, 0.99) * 1000,
+        "loop_lag_max_ms": max(run.lags, default=0.0) * 1000,
+        "loop_lag_mean_ms": (statistics.fmean(run.lags) * 1000
+                             if run.lags else 0.0),
+        "memory_per_entity_bytes": memory / entity_count,
+    }
+
+
+async def async_main(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """
+    Start the simulator and run the selected designs
+    """
+    simulator = ToonSimulator(
+        args.devices, port=args.port, latency=args.latency,
+        jitter=args.jitter, drop_rate=args.drop_rate, seed=args.seed,
+    )
+    await simulator.async_start()
+    try:
+        designs = (["timers", "coordinated"] if args.design == "all"
+                   else [args.design])
+        return [
+            await async_run(design, simulator, args.entities, args.interval,
+                            args.duration)
+            for design in designs
+        ]
+    finally:
+        await simulator.async_stop()
+
+
+def main() -> None:
+    """
+    Parse the command line, run the benchmark and print the results
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--devices", type=int, default=50,
+                        help="number of simulated Toons")
+    parser.add_argument("--entities", type=int, default=2,
+                        help="entities using the data of each Toon")
+    parser.add_argument("--interval", type=float, default=1.0,
+                        help="poll interval in seconds")
+    parser.add_argument("--duration", type=float, default=10.0,
+                        help="duration of each run in seconds")
+    parser.add_argument("--design", default="all",
+                        choices=["all", "timers", "coordinated"])
+    parser.add_argument("--port", type=int, default=18000,
+                        help="port of the first simulated Toon")
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true",
+                        help="print the results as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(async_main(args))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    columns = list(results[0])
+    print("  ".join(f"{column:>24}" for column in columns))
+    for result in results:
+        print("  ".join(
+            f"{value:>24.2f}" if isinstance(value, float)
+            else f"{value:>24}" for value in result.values()
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+"""
+Simulator for the happ_thermstat API of rooted Toon thermostats.
+
+Runs any number of simulated Toons on consecutive ports of one host, so the
+integration can be tested and benchmarked without a physical Toon.
+
+    python scripts/toon_simulator.py --count 10 --port 18000 --latency 0.05
+
+Supported actions:
+- getThermostatInfo
+- setSetpoint&Setpoint=<hundredths of a degree>
+- changeSchemeState&state=<programState>[&temperatureState=<activeState>]
+
+Also served are the other endpoints the integration can fetch:
+- /tsc/sensors
+- /boilerstatus/boilervalues.txt
+- /happ_pwrusage?action=GetCurrentUsage
+
+Responses use the 'text/javascript' content type of the Toon. Latency,
+jitter, extra latency of single endpoints, dropped connections and hanging
+requests can be configured to exercise timeouts and error handling.
+
+    python scripts/toon_simulator.py --path-latency /tsc/sensors=8
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+_LOGGER = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/javascript"
+
+"""
+Setpoints in hundredths of a degree for the activeState values
+comfort, home, sleep, away and vacation
+"""
+PRESET_SETPOINTS = {0: 2100, 1: 2000, 2: 1600, 3: 1500, 4: 1200}
+
+"""
+Degrees per second the room warms while heating and cools otherwise
+"""
+HEATING_RATE = 0.5 / 60
+COOLING_RATE = 0.1 / 60
+OUTSIDE_TEMPERATURE = 10.0
+
+"""
+Seconds to wait for running requests when the simulator stops, hanging
+requests are cancelled after it
+"""
+SHUTDOWN_TIMEOUT = 1.0
+
+
+class SimulatedToon:
+    """
+    State of a single simulated Toon
+    """
+
+    def __init__(self, rng: random.Random) -> None:
+        """
+        Initialize the simulated thermostat in home mode with the schedule on
+        """
+        self._rng = rng
+        self.current_temperature = 18.0 + rng.random() * 3
+        self.current_setpoint = PRESET_SETPOINTS[1]
+        self.program_state = 1
+        self.active_state = 1
+        self.burner_info = 0
+        self.modulation_level = 0
+        self.boiler_setpoint = 6
+        self.requests = 0
+        self._updated = time.monotonic()
+
+    def tick(self) -> None:
+        """
+        Advance the room temperature and the boiler to the current time
+        """
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+
+        setpoint = self.current_setpoint / 100
+        if self.current_temperature < setpoint - 0.1:
+            self.burner_info = 1
+        elif self.current_temperature >= setpoint:
+            self.burner_info = 0
+        if self.burner_info == 0 and self._rng.random() < 0.02:
+            self.burner_info = 2
+
+        if self.burner_info == 1:
+            difference = min(setpoint - self.current_temperature, 2.0)
+            self.modulation_level = max(10, int(difference * 50))
+            self.boiler_setpoint = 40 + int(difference * 15)
+            self.current_temperature += HEATING_RATE * elapsed
+        else:
+            self.modulation_level = 0 if self.burner_info == 0 else 100
+            self.boiler_setpoint = 6
+            self.current_temperature -= COOLING_RATE * elapsed * (
+                self.current_temperature > OUTSIDE_TEMPERATURE
+            )
+
+    def thermostat_info(self) -> Dict[str, str]:
+        """
+        Return the 'getThermostatInfo' payload, values are strings like
+        on a real Toon
+        """
+        self.tick()
+        measured = self.current_temperature + self._rng.uniform(-0.02, 0.02)
+        return {
+            "result": "ok",
+            "currentTemp": str(int(measured * 100)),
+            "currentSetpoint": str(self.current_setpoint),
+            "currentInternalBoilerSetpoint": str(self.boiler_setpoint),
+            "programState": str(self.program_state),
+            "activeState": str(self.active_state),
+            "nextProgram": "1",
+            "nextState": "2",
+            "nextTime": str(int(time.time()) + 3600),
+            "nextSetpoint": str(PRESET_SETPOINTS[2]),
+            "errorFound": "255",
+            "boilerModuleConnected": "1",
+            "realSetpoint": str(self.current_setpoint),
+            "burnerInfo": str(self.burner_info),
+            "otCommError": "0",
+            "currentModulationLevel": str(self.modulation_level),
+            "haveOTBoiler": "1",
+        }
+
+    def set_setpoint(self, setpoint: int) -> Dict[str, str]:
+        """
+        Handle 'setSetpoint', a manual setpoint overrides the active preset
+        until the next scheduled change
+        """
+        self.tick()
+        self.current_setpoint = setpoint
+        self.active_state = -1
+        if self.program_state == 1:
+            self.program_state = 2
+        return {"result": "ok"}
+
+    def change_scheme_state(self, state: int,
+                            temperature_state: Optional[int]
+                            ) -> Dict[str, str]:
+        """
+        Handle 'changeSchemeState'
+        """
+        self.tick()
+        if temperature_state is not None:
+            if temperature_state not in PRESET_SETPOINTS:
+                return {"result": "error"}
+            self.active_state = temperature_state
+            self.current_setpoint = PRESET_SETPOINTS[temperature_state]
+        if state in (0, 1):
+            self.program_state = state
+        elif state == 2 and self.program_state == 1:
+            self.program_state = 2
+        elif state not in (2, 8):
+            return {"result": "error"}
+        return {"result": "ok"}
+
+    def air_sensors(self) -> Dict[str, float]:
+        """
+        Return the '/tsc/sensors' payload of a Toon 2
+        """
+        self.tick()
+        return {
+            "temperature": round(self.current_temperature, 2),
+            "humidity": round(45 + self._rng.uniform(-5, 5), 1),
+            "tvoc": self._rng.randint(50, 300),
+            "eco2": self._rng.randint(400, 900),
+        }
+
+    def boiler_values(self) -> Dict[str, float]:
+        """
+        Return the '/boilerstatus/boilervalues.txt' payload
+        """
+        self.tick()
+        heating = self.burner_info == 1
+        return {
+            "sampleTime": time.strftime("%d-%m-%Y %H:%M:%S"),
+            "boilerSetpoint": float(self.boiler_setpoint),
+            "roomTemp": round(self.current_temperature, 2),
+            "roomTempSetpoint": self.current_setpoint / 100,
+            "boilerPressure": round(1.6 + self._rng.uniform(-0.05, 0.05), 2),
+            "boilerOutTemp": 55.0 if heating else 25.0,
+            "boilerInTemp": 40.0 if heating else 24.0,
+            "boilerModulationLevel": float(self.modulation_level),
+        }
+
+    def current_usage(self) -> Dict[str, object]:
+        """
+        Return the 'GetCurrentUsage' payload of happ_pwrusage
+        """
+        return {
+            "result": "ok",
+            "powerUsage": {"value": self._rng.randint(150, 2500),
+                           "dayCost": 1.23, "avgValue": 400.0},
+            "powerProduction": {"value": self._rng.randint(0, 1500),
+                                "dayCost": 0.45, "avgValue": 200.0},
+            "gasUsage": {"value": 120 if self.burner_info == 1 else 0,
+                         "dayCost": 0.89, "avgValue": 60.0},
+        }
+
+
+class ToonSimulator:
+    """
+    aiohttp application serving simulated Toons on consecutive ports
+    """
+
+    def __init__(self, count: int = 1, host: str = "127.0.0.1",
+                 port: int = 18000, latency: float = 0.0,
+                 jitter: float = 0.0, drop_rate: float = 0.0,
+                 hang_rate: float = 0.0, seed: Optional[int] = None,
+                 path_latency: Optional[Dict[str, float]] = None) -> None:
+        """
+        Initialize the simulator, path_latency adds latency in seconds to
+        the requests for some paths
+        """
+        self._rng = random.Random(seed)
+        self.host = host
+        self.ports = list(range(port, port + count))
+        self.devices = {
+            device_port: SimulatedToon(self._rng) for device_port in self.ports
+        }
+        self.latency = latency
+        self.jitter = jitter
+        self.drop_rate = drop_rate
+        self.hang_rate = hang_rate
+        self.path_latency = dict(path_latency or {})
+        self._runner = None
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        """
+        Handle a request for the Toon on the local port
+        """
+        device = self.devices[request.transport.get_extra_info("sockname")[1]]
+        device.requests += 1
+
+        if self.hang_rate and self._rng.random() < self.hang_rate:
+            await asyncio.sleep(3600)
+        delay = (self.latency + self._rng.uniform(0, self.jitter)
+                 + self.path_latency.get(request.path, 0.0))
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.drop_rate and self._rng.random() < self.drop_rate:
+            request.transport.close()
+            return web.Response()
+
+        action = request.query.get("action")
+        try:
+            if request.path == "/tsc/sensors":
+                data = device.air_sensors()
+            elif request.path == "/boilerstatus/boilervalues.txt":
+                data = device.boiler_values()
+            elif request.path == "/happ_pwrusage":
+                data = (device.current_usage()
+                        if action == "GetCurrentUsage"
+                        else {"result": "error", "reason": "unknown action"})
+            elif action == "getThermostatInfo":
+                data = device.thermostat_info()
+            elif action == "setSetpoint":
+                data = device.set_setpoint(int(request.query["Setpoint"]))
+            elif action == "changeSchemeState":
+                temperature_state = request.query.get("temperatureState")
+                data = device.change_scheme_state(
+                    int(request.query["state"]),
+                    None if temperature_state is None
+                    else int(temperature_state),
+                )
+            else:
+                data = {"result": "error", "reason": "unknown action"}
+        except (KeyError, ValueError):
+            data = {"result": "error", "reason": "invalid parameters"}
+
+        return web.Response(text=json.dumps(data), content_type=CONTENT_TYPE)
+
+    async def async_start(self) -> None:
+        """
+        Start serving all simulated Toons
+        """
+        app = web.Application()
+        app.router.add_get("/happ_thermstat", self._handle)
+        app.router.add_get("/tsc/sensors", self._handle)
+        app.router.add_get("/boilerstatus/boilervalues.txt", self._handle)
+        app.router.add_get("/happ_pwrusage", self._handle)
+        self._runner = web.AppRunner(app, access_log=None,
+                                     shutdown_timeout=SHUTDOWN_TIMEOUT)
+        await self._runner.setup()
+        for device_port in self.ports:
+            await web.TCPSite(self._runner, self.host, device_port).start()
+
+    async def async_stop(self) -> None:
+        """
+        Stop serving
+        """
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @property
+    def request_counts(self) -> List[int]:
+        """
+        Return the number of requests handled per Toon
+        """
+        return [self.devices[device_port].requests
+                for device_port in self.ports]
+
+
+async def _async_main(args: argparse.Namespace) -> None:
+    """
+    Run the simulator until interrupted
+    """
+    simulator = ToonSimulator(
+        args.count, args.host, args.port, args.latency, args.jitter,
+        args.drop_rate, args.hang_rate, args.seed,
+        dict(args.path_latency),
+    )
+    await simulator.async_start()
+    _LOGGER.info("Simulating %s Toon(s) on %s ports %s-%s", args.count,
+                 args.host, simulator.ports[0], simulator.ports[-1])
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await simulator.async_stop()
+
+
+def _parse_path_latency(value: str) -> Tuple[str, float]:
+    """
+    Parse a PATH=SECONDS command line value
+    """
+    path, _, seconds = value.rpartition("=")
+    try:
+        return path, float(seconds)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"expected PATH=SECONDS, got '{value}'") from None
+
+
+def main() -> None:
+    """
+    Parse the command line and run the simulator
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--count", type=int, default=1,
+                        help="number of simulated Toons")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18000,
+                        help="port of the first Toon")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="response latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0,
+                        help="random extra latency up to this many seconds")
+    parser.add_argument("--drop-rate", type=float, default=0.0,
+                        help="fraction of connections closed without reply")
+    parser.add_argument("--hang-rate", type=float, default=0.0,
+                        help="fraction of requests that never complete")
+    parser.add_argument("--path-latency", action="append", default=[],
+                        type=_parse_path_latency, metavar="PATH=SECONDS",
+                        help="extra latency of the requests for a path")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(_async_main(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
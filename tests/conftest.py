@@ -0,0 +1,49 @@
+"""
+Shared fixtures for the tests of the Toon integration.
+
+The modules without Home Assistant dependencies are tested directly, the
+API client against the simulator in scripts/toon_simulator.py.
+"""
+
+import os
+import socket
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+
+
+@pytest.fixture
+def port(request) -> int:
+    """
+    Return a free local port for a simulated Toon
+
+    pytest-homeassistant-custom-component blocks sockets, they are allowed
+    again for the tests using the simulator.
+    """
+    if request.config.pluginmanager.hasplugin("socket"):
+        request.getfixturevalue("socket_enabled")
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def payload():
+    """
+    Return a 'getThermostatInfo' payload as a Toon sends it
+    """
+    return {
+        "result": "ok",
+        "currentTemp": "2012",
+        "currentSetpoint": "2000",
+        "currentInternalBoilerSetpoint": "6",
+        "programState": "1",
+        "activeState": "1",
+        "burnerInfo": "0",
+        "otCommError": "0",
+        "currentModulationLevel": "0",
+    }
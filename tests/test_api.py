@@ -0,0 +1,151 @@
+"""
+Tests of the API client against the Toon simulator.
+"""
+
+import asyncio
+
+import pytest
+from toon_simulator import ToonSimulator
+
+from custom_components.toon_climate import api as api_module
+from custom_components.toon_climate.api import ToonApi
+from custom_components.toon_climate.const import (
+    ENDPOINT_BOILER,
+    EXTRA_ENDPOINTS,
+    REQUEST_TIMEOUT,
+)
+from custom_components.toon_climate.metrics import (
+    RESULT_CONNECTION_ERROR,
+    RESULT_TIMEOUT,
+)
+from custom_components.toon_climate.resilience import AdaptiveTimeout
+
+BOILER_PATH, _ = EXTRA_ENDPOINTS[ENDPOINT_BOILER]
+
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(monkeypatch):
+    """
+    Retry failed requests without waiting
+    """
+    monkeypatch.setattr(api_module, "RETRY_DELAY", 0)
+
+
+async def _async_with_simulator(port, test, **options):
+    """
+    Run a test coroutine with a client for a simulated Toon
+    """
+    simulator = ToonSimulator(port=port, **options)
+    await simulator.async_start()
+    api = ToonApi("toon", simulator.host, port, setpoint_debounce=0)
+    try:
+        return await test(api, simulator.devices[port])
+    finally:
+        await api.async_close()
+        await simulator.async_stop()
+
+
+def test_poll(port):
+    async def test(api, device):
+        payload = await api.async_get_thermostat_info()
+        assert payload["currentSetpoint"] == "2000"
+        assert api.connection_stats["connections_created"] == 1
+
+    asyncio.run(_async_with_simulator(port, test))
+
+
+def test_failed_poll_counts_once(port):
+    async def test():
+        api = ToonApi("toon", "127.0.0.1", port)
+        try:
+            assert await api.async_get_thermostat_info() == {}
+            assert api.metrics.counters[RESULT_CONNECTION_ERROR] == 3
+            assert api.breaker.failures == 1
+            assert api.available
+            await api.async_get_thermostat_info()
+            await api.async_get_thermostat_info()
+            assert not api.available
+            assert api.metrics.counters[RESULT_CONNECTION_ERROR] == 9
+            assert await api.async_get_thermostat_info() == {}
+            assert api.metrics.counters[RESULT_CONNECTION_ERROR] == 9
+        finally:
+            await api.async_close()
+
+    asyncio.run(test())
+
+
+def test_hanging_request_times_out(port):
+    async def test(api, device):
+        api.read_timeout = AdaptiveTimeout(minimum=0.1, maximum=0.2)
+        assert await api.async_get_thermostat_info() == {}
+        assert api.metrics.counters[RESULT_TIMEOUT] == 3
+        assert api.breaker.failures == 1
+
+    asyncio.run(_async_with_simulator(port, test, hang_rate=1))
+
+
+def test_slow_extra_endpoint_keeps_toon_available(port):
+    async def test(api, device):
+        for _ in range(3):
+            payload, boiler = await asyncio.gather(
+                api.async_get_thermostat_info(),
+                api.async_get_endpoint(BOILER_PATH, timeout=0.2),
+            )
+            assert payload
+            assert boiler == {}
+        assert api.available
+        assert api.breaker.failures == 0
+        assert api.metrics.counters[RESULT_TIMEOUT] == 3
+        assert api.read_timeout.timeout == REQUEST_TIMEOUT
+
+    asyncio.run(_async_with_simulator(port, test,
+                                      path_latency={BOILER_PATH: 1}))
+
+
+def test_setpoint_switches_to_manual(port):
+    async def test(api, device):
+        assert await api.async_set_setpoint(2222) == {"result": "ok"}
+        payload = await api.async_get_thermostat_info()
+        assert payload["currentSetpoint"] == "2222"
+        assert payload["activeState"] == "-1"
+        assert payload["programState"] == "2"
+
+    asyncio.run(_async_with_simulator(port, test))
+
+
+def test_rejected_command(port):
+    async def test(api, device):
+        response = await api.async_change_scheme_state(
+            2, 7, expected={"activeState": "7"})
+        assert response == {"result": "error"}
+
+    asyncio.run(_async_with_simulator(port, test))
+
+
+def test_command_runs_before_queued_extras(port):
+    async def test(api, device):
+        poll = asyncio.gather(
+            api.async_get_thermostat_info(),
+            api.async_get_endpoint(BOILER_PATH),
+            api.async_get_endpoint(*EXTRA_ENDPOINTS["power_usage"]),
+        )
+        await asyncio.sleep(0)
+        write = asyncio.ensure_future(api.async_set_setpoint(2222))
+        done, _ = await asyncio.wait([poll, write],
+                                     return_when=asyncio.FIRST_COMPLETED)
+        assert done == {write}
+        payload, *_ = await poll
+        assert payload["currentSetpoint"] == "2000"
+        assert device.current_setpoint == 2222
+
+    asyncio.run(_async_with_simulator(port, test, latency=0.05))
+
+
+def test_background_request_skips_semaphore(port):
+    async def test(api, device):
+        api._semaphore = asyncio.Semaphore(0)
+        data = await asyncio.wait_for(
+            api.async_get_endpoint("/tsc/sensors", background=True), 5)
+        assert "humidity" in data
+
+    asyncio.run(_async_with_simulator(port, test))
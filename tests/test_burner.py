@@ -0,0 +1,70 @@
+"""
+Tests of the burner cycle and runtime counters.
+"""
+
+from custom_components.toon_climate.burner import BurnerStatistics
+
+START = 1_700_000_000
+
+
+def _feed(states, step: float = 60) -> BurnerStatistics:
+    """
+    Return statistics updated with burner states at a fixed step
+    """
+    statistics = BurnerStatistics()
+    for index, state in enumerate(states):
+        statistics.update(START + index * step, state)
+    return statistics
+
+
+def test_heating_cycle():
+    statistics = _feed([0, 1, 1, 1, 1, 1, 1, 0])
+    assert statistics.heating_cycles == 1
+    assert statistics.short_cycles == 0
+    assert statistics.heating_runtime == 360
+    assert statistics.cycles_per_hour(START + 420) == 1
+
+
+def test_preheating_is_heating():
+    statistics = _feed([0, 1, 1, 3, 3, 1, 1, 0])
+    assert statistics.heating_cycles == 1
+    assert statistics.short_cycles == 0
+    assert statistics.heating_runtime == 360
+
+
+def test_preheating_starts_a_cycle():
+    statistics = _feed([0, 3, 3, 1, 0])
+    assert statistics.heating_cycles == 1
+    assert statistics.short_cycles == 1
+    assert statistics.heating_runtime == 180
+
+
+def test_short_cycles_and_hot_water():
+    statistics = _feed([0, 1, 0, 2, 2, 0, 1, 0])
+    assert statistics.heating_cycles == 2
+    assert statistics.short_cycles == 2
+    assert statistics.hot_water_cycles == 1
+    assert statistics.hot_water_runtime == 120
+
+
+def test_gap_is_not_counted():
+    statistics = BurnerStatistics()
+    statistics.update(START, 1)
+    assert not statistics.update(START + 3600, 1)
+    assert statistics.heating_runtime == 0
+    assert statistics.heating_cycles == 0
+
+
+def test_unchanged_off_state():
+    statistics = BurnerStatistics()
+    statistics.update(START, 0)
+    assert not statistics.update(START + 60, 0)
+
+
+def test_restore():
+    statistics = _feed([0, 1, 1])
+    restored = BurnerStatistics.from_dict(statistics.as_dict())
+    assert restored.as_dict() == statistics.as_dict()
+    restored.update(START + 180, 3)
+    assert restored.heating_cycles == 1
+    assert restored.heating_runtime == 120
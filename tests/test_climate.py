@@ -0,0 +1,324 @@
+"""
+Tests of the climate entity and the services, these need Home Assistant and
+pytest-homeassistant-custom-component.
+
+The requests of the API client are answered by a fake Toon, the scheduling,
+retries and circuit breaker of the client are the real ones.
+"""
+
+from datetime import timedelta
+from time import monotonic
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from homeassistant.components.climate import (  # noqa: E402
+    ATTR_HVAC_MODE,
+    ATTR_PRESET_MODE,
+    DOMAIN as CLIMATE_DOMAIN,
+    PRESET_AWAY,
+    PRESET_HOME,
+    SERVICE_SET_PRESET_MODE,
+    SERVICE_SET_TEMPERATURE,
+    HVACMode,
+)
+from homeassistant.const import (  # noqa: E402
+    ATTR_ENTITY_ID,
+    ATTR_TEMPERATURE,
+    EVENT_STATE_CHANGED,
+)
+from homeassistant.setup import async_setup_component  # noqa: E402
+from homeassistant.util import dt as dt_util  # noqa: E402
+from pytest_homeassistant_custom_component.common import (  # noqa: E402
+    async_capture_events,
+    async_fire_time_changed,
+)
+import voluptuous as vol  # noqa: E402
+
+from custom_components.toon_climate import api as api_module  # noqa: E402
+from custom_components.toon_climate.api import ToonApi  # noqa: E402
+from custom_components.toon_climate.const import (  # noqa: E402
+    CONFIRMATION_DELAY,
+    INTEGRATION_DOMAIN,
+    SERVICE_BULK_APPLY,
+    STORAGE_VERSION,
+)
+from custom_components.toon_climate.hub import async_get_hub  # noqa: E402
+from custom_components.toon_climate.metrics import (  # noqa: E402
+    RESULT_CONNECTION_ERROR,
+    RESULT_SUCCESS,
+)
+from custom_components.toon_climate.snapshot import (  # noqa: E402
+    PAYLOAD_FIELDS,
+)
+
+HOST = "192.0.2.10"
+ENTITY_ID = "climate.toon_thermostat"
+
+
+class FakeToon:
+    """
+    Toon answering the requests of all API clients from a payload
+    """
+
+    def __init__(self, payload) -> None:
+        """
+        Initialize with the payload of 'getThermostatInfo'
+        """
+        self.payload = payload
+        self.requests = []
+        self.reachable = True
+        self.reject = False
+        self.echo = False
+        self.on_command = None
+
+    async def async_request(self, action, params=None, path=None,
+                            timeout=None, tracked=True):
+        """
+        Answer a request like ToonApi._async_request
+        """
+        if not self.reachable:
+            return {}, RESULT_CONNECTION_ERROR, False
+        self.requests.append(action)
+        if action == "getThermostatInfo":
+            return dict(self.payload), RESULT_SUCCESS, True
+        if self.on_command is not None:
+            self.on_command()
+        if self.reject:
+            return {"result": "error"}, RESULT_SUCCESS, True
+        if action == "setSetpoint":
+            self.payload["currentSetpoint"] = str(params["Setpoint"])
+            self.payload["activeState"] = "-1"
+            if self.payload["programState"] == "1":
+                self.payload["programState"] = "2"
+        elif action == "changeSchemeState":
+            if "temperatureState" in params:
+                self.payload["activeState"] = str(params["temperatureState"])
+            if params["state"] in (0, 1):
+                self.payload["programState"] = str(params["state"])
+        if self.echo:
+            return dict(self.payload), RESULT_SUCCESS, True
+        return {"result": "ok"}, RESULT_SUCCESS, True
+
+    def count(self, action) -> int:
+        """
+        Return the number of requests of an action
+        """
+        return self.requests.count(action)
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """
+    Load the integration from custom_components
+    """
+    yield
+
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(monkeypatch):
+    """
+    Retry failed requests without waiting
+    """
+    monkeypatch.setattr(api_module, "RETRY_DELAY", 0)
+
+
+@pytest.fixture
+def toon(payload):
+    """
+    Return the fake Toon answering the API clients
+    """
+    toon = FakeToon(payload)
+    with patch.object(ToonApi, "_async_request", toon.async_request):
+        yield toon
+
+
+async def _async_setup(hass, *configs, **options):
+    """
+    Set up Toon thermostats and return the entity of the first one
+    """
+    configs = configs or ({},)
+    assert await async_setup_component(hass, CLIMATE_DOMAIN, {
+        CLIMATE_DOMAIN: [
+            {"platform": INTEGRATION_DOMAIN, "host": HOST,
+             "setpoint_debounce": 0, **options, **config}
+            for config in configs
+        ]
+    })
+    await hass.async_block_till_done()
+    return async_get_hub(hass).entities[ENTITY_ID]
+
+
+async def _async_set_temperature(hass, temperature: float) -> None:
+    """
+    Call the set_temperature service of the thermostat
+    """
+    await hass.services.async_call(
+        CLIMATE_DOMAIN, SERVICE_SET_TEMPERATURE,
+        {ATTR_ENTITY_ID: ENTITY_ID, ATTR_TEMPERATURE: temperature},
+        blocking=True,
+    )
+
+
+async def _async_confirm(hass) -> None:
+    """
+    Let the confirmation delay pass
+    """
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=CONFIRMATION_DELAY + 1)
+    )
+    await hass.async_block_till_done()
+
+
+def _temperature(hass) -> float:
+    """
+    Return the target temperature shown by the thermostat
+    """
+    return hass.states.get(ENTITY_ID).attributes[ATTR_TEMPERATURE]
+
+
+async def test_setpoint_is_shown_before_the_toon_answers(hass, toon):
+    await _async_setup(hass)
+    shown = []
+    toon.on_command = lambda: shown.append(_temperature(hass))
+    await _async_set_temperature(hass, 22.5)
+    assert shown == [22.5]
+    assert _temperature(hass) == 22.5
+    await _async_confirm(hass)
+    assert _temperature(hass) == 22.5
+
+
+async def test_rejected_setpoint_is_rolled_back(hass, toon):
+    await _async_setup(hass)
+    toon.reject = True
+    await _async_set_temperature(hass, 22.5)
+    assert _temperature(hass) == 20.0
+    await _async_confirm(hass)
+    assert toon.count("getThermostatInfo") == 1
+
+
+async def test_confirmation_shows_state_of_the_toon(hass, toon):
+    entity = await _async_setup(hass)
+    await _async_set_temperature(hass, 22.5)
+    toon.payload["currentSetpoint"] = "1900"
+    await entity.coordinator.async_refresh()
+    assert _temperature(hass) == 22.5
+    await _async_confirm(hass)
+    assert _temperature(hass) == 19.0
+
+
+async def test_setpoint_switches_to_manual_after_confirmation(hass, toon):
+    await _async_setup(hass)
+    assert hass.states.get(ENTITY_ID).attributes[ATTR_PRESET_MODE] \
+        == PRESET_HOME
+    await _async_set_temperature(hass, 22.5)
+    await _async_confirm(hass)
+    state = hass.states.get(ENTITY_ID)
+    assert state.attributes[ATTR_PRESET_MODE] is None
+    assert state.state == HVACMode.AUTO
+
+
+async def test_full_state_response_is_not_confirmed(hass, toon):
+    entity = await _async_setup(hass)
+    toon.echo = True
+    await hass.services.async_call(
+        CLIMATE_DOMAIN, SERVICE_SET_PRESET_MODE,
+        {ATTR_ENTITY_ID: ENTITY_ID, ATTR_PRESET_MODE: PRESET_AWAY},
+        blocking=True,
+    )
+    assert set(PAYLOAD_FIELDS).issubset(toon.payload)
+    assert entity.coordinator.data.active_state == 3
+    await _async_confirm(hass)
+    assert toon.count("getThermostatInfo") == 1
+    assert hass.states.get(ENTITY_ID).attributes[ATTR_PRESET_MODE] \
+        == PRESET_AWAY
+
+
+async def test_unchanged_poll_does_not_write_state(hass, toon):
+    entity = await _async_setup(hass)
+    with patch.object(entity, "async_write_ha_state") as write:
+        await entity.coordinator.async_refresh()
+        assert not write.called
+        toon.payload["currentTemp"] = "2050"
+        await entity.coordinator.async_refresh()
+        assert write.call_count == 1
+
+
+async def test_force_refresh_interval(hass, toon):
+    entity = await _async_setup(hass, force_refresh_interval=60)
+    events = async_capture_events(hass, EVENT_STATE_CHANGED)
+    await entity.coordinator.async_refresh()
+    assert events == []
+    with patch("custom_components.toon_climate.climate.monotonic",
+               return_value=monotonic() + 61):
+        await entity.coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert [event.data[ATTR_ENTITY_ID] for event in events] == [ENTITY_ID]
+    assert not entity.force_update
+
+
+async def test_bulk_apply(hass, toon):
+    await _async_setup(hass, {}, {"name": "Toon 2", "port": 8080})
+    entity_ids = [ENTITY_ID, "climate.toon_2", "climate.other"]
+    response = await hass.services.async_call(
+        INTEGRATION_DOMAIN, SERVICE_BULK_APPLY,
+        {ATTR_ENTITY_ID: entity_ids, ATTR_TEMPERATURE: 21.5},
+        blocking=True, return_response=True,
+    )
+    assert response == {"results": {
+        ENTITY_ID: {"success": True},
+        "climate.toon_2": {"success": True},
+        "climate.other": {"success": False,
+                          "error": "not a Toon thermostat"},
+    }}
+    assert toon.count("setSetpoint") == 2
+    await _async_confirm(hass)
+    assert hass.states.get("climate.toon_2").attributes[ATTR_TEMPERATURE] \
+        == 21.5
+
+
+async def test_bulk_apply_reports_failed_commands(hass, toon):
+    await _async_setup(hass)
+    toon.reject = True
+    response = await hass.services.async_call(
+        INTEGRATION_DOMAIN, SERVICE_BULK_APPLY,
+        {ATTR_ENTITY_ID: "all", ATTR_HVAC_MODE: HVACMode.HEAT},
+        blocking=True, return_response=True,
+    )
+    assert response == {"results": {
+        ENTITY_ID: {"success": False, "error": "command failed"},
+    }}
+
+
+async def test_bulk_apply_needs_a_single_target(hass, toon):
+    await _async_setup(hass)
+    with pytest.raises(vol.Invalid):
+        await hass.services.async_call(
+            INTEGRATION_DOMAIN, SERVICE_BULK_APPLY,
+            {ATTR_ENTITY_ID: ENTITY_ID, ATTR_TEMPERATURE: 21.5,
+             ATTR_PRESET_MODE: PRESET_AWAY},
+            blocking=True, return_response=True,
+        )
+
+
+async def test_unreachable_toon_shows_stored_state(hass, hass_storage, toon):
+    hass_storage[f"{INTEGRATION_DOMAIN}.{HOST}_80"] = {
+        "version": STORAGE_VERSION,
+        "key": f"{INTEGRATION_DOMAIN}.{HOST}_80",
+        "data": {
+            "burner": {},
+            "snapshot": {"current_temperature": 19.5,
+                         "current_setpoint": 21.0, "program_state": 1,
+                         "active_state": 1, "burner_info": 0},
+        },
+    }
+    toon.reachable = False
+    await _async_setup(hass)
+    state = hass.states.get(ENTITY_ID)
+    assert state.attributes[ATTR_TEMPERATURE] == 21.0
+    assert state.attributes["current_temperature"] == 19.5
+    toon.reachable = True
+    await async_get_hub(hass).entities[ENTITY_ID].coordinator.async_refresh()
+    assert _temperature(hass) == 20.0
@@ -0,0 +1,126 @@
+"""
+Tests of the data update coordinator, these need Home Assistant and
+pytest-homeassistant-custom-component.
+"""
+
+import asyncio
+from datetime import timedelta
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from custom_components.toon_climate.const import (  # noqa: E402
+    ENDPOINT_BOILER,
+    FAST_SCAN_INTERVAL,
+)
+from custom_components.toon_climate.coordinator import (  # noqa: E402
+    ToonDataUpdateCoordinator,
+)
+from custom_components.toon_climate.snapshot import (  # noqa: E402
+    ThermostatSnapshot,
+)
+
+BOILER_VALUES = {"boilerPressure": 1.6}
+
+
+class FakeApi:
+    """
+    API client returning a fixed payload, the extra endpoints answer once
+    released
+    """
+
+    name = "toon"
+    available = True
+
+    def __init__(self, payload) -> None:
+        """
+        Initialize with the payload of 'getThermostatInfo'
+        """
+        self.payload = payload
+        self.release = asyncio.Event()
+
+    async def async_get_thermostat_info(self):
+        """
+        Return the payload
+        """
+        return dict(self.payload)
+
+    async def async_get_endpoint(self, path, action=None):
+        """
+        Return the boiler values once released
+        """
+        await self.release.wait()
+        return BOILER_VALUES
+
+    async def async_close(self) -> None:
+        """
+        Nothing to close
+        """
+
+
+def _seconds_to_next_poll(hass, coordinator) -> float:
+    """
+    Return the seconds until the scheduled poll of a coordinator
+    """
+    return coordinator._unsub_refresh.__self__.when() - hass.loop.time()
+
+
+async def _async_poll(hass, payload, write):
+    """
+    Poll with an extra endpoint, optionally applying a command meanwhile
+    """
+    api = FakeApi(payload)
+    coordinator = ToonDataUpdateCoordinator(
+        hass, api, timedelta(seconds=60), extra_endpoints=(ENDPOINT_BOILER,)
+    )
+    coordinator.data = ThermostatSnapshot.from_payload(payload)
+    poll = asyncio.ensure_future(coordinator._async_update_data())
+    await asyncio.sleep(0)
+    if write:
+        assert coordinator.async_apply_write_response(
+            {"result": "ok"}, {"currentSetpoint": "2222"})
+    api.release.set()
+    data = await poll
+    assert coordinator.extra_data[ENDPOINT_BOILER] == BOILER_VALUES
+    await coordinator.async_shutdown()
+    return data
+
+
+async def test_poll_publishes_payload(hass, payload):
+    payload["currentSetpoint"] = "2100"
+    data = await _async_poll(hass, payload, write=False)
+    assert data.current_setpoint == 21.0
+
+
+async def test_command_during_poll_is_kept(hass, payload):
+    data = await _async_poll(hass, payload, write=True)
+    assert data.current_setpoint == 22.22
+
+
+async def test_stagger_offset_is_kept_after_first_poll(hass, payload):
+    api = FakeApi(payload)
+    coordinator = ToonDataUpdateCoordinator(
+        hass, api, timedelta(seconds=60), stagger_offset=timedelta(seconds=30)
+    )
+    unsubscribe = coordinator.async_add_listener(lambda: None)
+    assert _seconds_to_next_poll(hass, coordinator) == pytest.approx(90, abs=1)
+    await coordinator.async_refresh()
+    assert _seconds_to_next_poll(hass, coordinator) == pytest.approx(90, abs=1)
+    await coordinator.async_refresh()
+    assert _seconds_to_next_poll(hass, coordinator) == pytest.approx(60, abs=1)
+    unsubscribe()
+    await coordinator.async_shutdown()
+
+
+async def test_boost_moves_scheduled_poll_forward(hass, payload):
+    coordinator = ToonDataUpdateCoordinator(
+        hass, FakeApi(payload), timedelta(seconds=60), adaptive_polling=True
+    )
+    unsubscribe = coordinator.async_add_listener(lambda: None)
+    assert _seconds_to_next_poll(hass, coordinator) == pytest.approx(60, abs=1)
+    coordinator.async_boost()
+    assert _seconds_to_next_poll(hass, coordinator) == pytest.approx(
+        FAST_SCAN_INTERVAL, abs=1)
+    unsubscribe()
+    await coordinator.async_shutdown()
@@ -0,0 +1,46 @@
+"""
+Tests of the ring buffer of recent thermostat samples.
+"""
+
+from custom_components.toon_climate.history import SampleHistory
+from custom_components.toon_climate.snapshot import ThermostatSnapshot
+
+
+def _snapshot(temperature: float) -> ThermostatSnapshot:
+    """
+    Return a snapshot with a temperature and no boiler values
+    """
+    return ThermostatSnapshot(current_temperature=temperature,
+                              current_setpoint=20.0, burner_info=0)
+
+
+def test_window():
+    history = SampleHistory(size=10)
+    for index, temperature in enumerate((19.0, 20.0, 21.0)):
+        history.append(100 + index, _snapshot(temperature))
+    window = history.window(101)
+    assert window["count"] == 2
+    assert window["current_temperature"] == {
+        "min": 20.0, "max": 21.0, "mean": 20.5, "last": 21.0
+    }
+    assert window["modulation_level"]["mean"] is None
+
+
+def test_ring_buffer_wraps():
+    history = SampleHistory(size=3)
+    for index in range(5):
+        history.append(index, _snapshot(float(index)))
+    assert len(history) == 3
+    assert [sample["current_temperature"]
+            for sample in history.samples(0)] == [2.0, 3.0, 4.0]
+    assert history.window(3)["count"] == 2
+
+
+def test_samples():
+    history = SampleHistory(size=3)
+    history.append(0, _snapshot(19.5))
+    sample, = history.samples(0)
+    assert sample["time"] == "1970-01-01T00:00:00+00:00"
+    assert sample["current_temperature"] == 19.5
+    assert sample["modulation_level"] is None
+    assert history.samples(1) == []
@@ -0,0 +1,78 @@
+"""
+Tests of the circuit breaker and the adaptive request timeout.
+"""
+
+import random
+
+from custom_components.toon_climate.resilience import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    AdaptiveTimeout,
+    CircuitBreaker,
+)
+
+
+def _breaker() -> CircuitBreaker:
+    """
+    Return a breaker opening after 3 failures, without backoff or jitter
+    """
+    return CircuitBreaker(failure_threshold=3, base_backoff=0, jitter=0,
+                          rng=random.Random(0))
+
+
+def test_opens_after_threshold():
+    breaker = _breaker()
+    assert not breaker.record_failure()
+    assert not breaker.record_failure()
+    assert breaker.closed
+    assert breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+
+
+def test_success_resets_failures():
+    breaker = _breaker()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert not breaker.record_success()
+    assert not breaker.record_failure()
+    assert breaker.closed
+
+
+def test_half_open_probe():
+    breaker = _breaker()
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.allow_request()
+    assert breaker.state == STATE_HALF_OPEN
+    assert not breaker.allow_request()
+    assert not breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+    assert breaker.allow_request()
+    assert breaker.record_success()
+    assert breaker.state == STATE_CLOSED
+
+
+def test_backoff_doubles_up_to_maximum():
+    breaker = CircuitBreaker(failure_threshold=1, base_backoff=10,
+                             max_backoff=30, jitter=0)
+    retry_in = []
+    for _ in range(4):
+        breaker.record_failure()
+        retry_in.append(round(breaker.retry_in))
+        breaker.state = STATE_HALF_OPEN
+    assert retry_in == [10, 20, 30, 30]
+
+
+def test_adaptive_timeout():
+    timeout = AdaptiveTimeout(factor=3, minimum=0.5, maximum=5,
+                              min_samples=5)
+    assert timeout.timeout == 5
+    for _ in range(5):
+        timeout.record(0.1)
+    assert timeout.timeout == 0.5
+    for _ in range(5):
+        timeout.record(1.0)
+    assert timeout.timeout == 3.0
+    timeout.record_timeout()
+    assert timeout.timeout == 5
@@ -0,0 +1,47 @@
+"""
+Tests of the conversion of the round-robin history into hourly statistics.
+"""
+
+from custom_components.toon_climate.rrd import (
+    hourly_means,
+    hourly_sums,
+    parse_rrd,
+)
+
+HOUR = 3600
+
+
+def test_parse_rrd():
+    data = {"7200": "2000", "3600": "1000", "10800": "nan", "x": "1"}
+    assert parse_rrd(data, 0.001) == [(3600, 1.0), (7200, 2.0)]
+    assert parse_rrd({"3600": None}) == []
+
+
+def test_hourly_means():
+    points = [(0, 19.0), (1800, 21.0), (HOUR, 20.0), (2 * HOUR, 22.0)]
+    rows = hourly_means(points, None, 2 * HOUR + 1)
+    assert rows == [
+        {"start": 0, "mean": 20.0, "min": 19.0, "max": 21.0},
+        {"start": HOUR, "mean": 20.0, "min": 20.0, "max": 20.0},
+    ]
+    assert hourly_means(points, 0, 2 * HOUR + 1) == rows[1:]
+
+
+def test_hourly_sums_continue_after_last_import():
+    points = [(0, 100.0), (HOUR, 101.5), (2 * HOUR, 103.0)]
+    rows = hourly_sums(points, 0, 3 * HOUR, last_sum=10.0)
+    assert rows == [
+        {"start": HOUR, "state": 101.5, "sum": 11.5},
+        {"start": 2 * HOUR, "state": 103.0, "sum": 13.0},
+    ]
+
+
+def test_hourly_sums_replaced_meter():
+    points = [(0, 100.0), (HOUR, 2.0), (2 * HOUR, 3.0)]
+    rows = hourly_sums(points, None, 3 * HOUR)
+    assert [row["sum"] for row in rows] == [0, 0, 1.0]
+
+
+def test_incomplete_hour_is_skipped():
+    points = [(0, 100.0), (HOUR, 101.0)]
+    assert len(hourly_sums(points, None, HOUR + 1)) == 1
@@ -0,0 +1,81 @@
+"""
+Tests of the request scheduling for a single Toon.
+"""
+
+import asyncio
+
+from custom_components.toon_climate.scheduler import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_READ,
+    PRIORITY_WRITE,
+    RequestScheduler,
+)
+
+
+async def _async_run_queued(requests):
+    """
+    Queue (key, priority) requests behind a running one, return the order
+    in which they ran and their results
+    """
+    scheduler = RequestScheduler()
+    order = []
+    release = asyncio.Event()
+
+    async def blocker():
+        await release.wait()
+        return "blocker"
+
+    def request(key):
+        async def run():
+            order.append(key)
+            return key
+        return run
+
+    running = asyncio.ensure_future(scheduler.async_run("blocker", blocker))
+    await asyncio.sleep(0)
+    queued = [
+        asyncio.ensure_future(scheduler.async_run(key, request(key),
+                                                  priority))
+        for key, priority in requests
+    ]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(running, *queued)
+    return order, results, scheduler
+
+
+def test_priority_order():
+    order, _, _ = asyncio.run(_async_run_queued([
+        ("history", PRIORITY_BACKGROUND),
+        ("poll", PRIORITY_READ),
+        ("command", PRIORITY_WRITE),
+        ("sensors", PRIORITY_READ),
+    ]))
+    assert order == ["command", "poll", "sensors", "history"]
+
+
+def test_identical_requests_collapse():
+    order, results, scheduler = asyncio.run(_async_run_queued([
+        ("poll", PRIORITY_READ),
+        ("poll", PRIORITY_READ),
+    ]))
+    assert order == ["poll"]
+    assert results == ["blocker", "poll", "poll"]
+    assert scheduler.collapsed == 1
+    assert scheduler.pending == 0
+
+
+def test_exception_is_passed_to_caller():
+    async def failing():
+        raise ValueError("failed")
+
+    async def run():
+        scheduler = RequestScheduler()
+        try:
+            await scheduler.async_run("key", failing)
+        except ValueError:
+            return await scheduler.async_run("key",
+                                             lambda: asyncio.sleep(0))
+        return "not raised"
+
+    assert asyncio.run(run()) is None
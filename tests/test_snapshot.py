@@ -0,0 +1,88 @@
+"""
+Tests of the parsed thermostat state.
+"""
+
+import pytest
+
+from custom_components.toon_climate.snapshot import ThermostatSnapshot
+
+
+def _snapshot(temperature: float, modulation: int = 0) -> ThermostatSnapshot:
+    """
+    Return a snapshot with a temperature and modulation level
+    """
+    return ThermostatSnapshot(current_temperature=temperature,
+                              modulation_level=modulation)
+
+
+def test_from_payload(payload):
+    snapshot = ThermostatSnapshot.from_payload(payload)
+    assert snapshot.current_temperature == 20.12
+    assert snapshot.current_setpoint == 20.0
+    assert snapshot.program_state == 1
+    assert snapshot.burner_info == 0
+
+
+def test_from_payload_requires_all_keys(payload):
+    del payload["currentTemp"]
+    with pytest.raises(KeyError):
+        ThermostatSnapshot.from_payload(payload)
+
+
+def test_partial_payload_keeps_base(payload):
+    base = ThermostatSnapshot.from_payload(payload)
+    snapshot = ThermostatSnapshot.from_payload({"currentSetpoint": "2222"},
+                                               base)
+    assert snapshot.current_setpoint == 22.22
+    assert snapshot.diff(base) == ("current_setpoint",)
+
+
+def test_immutable_and_comparable(payload):
+    snapshot = ThermostatSnapshot.from_payload(payload)
+    with pytest.raises(AttributeError):
+        snapshot.current_setpoint = 21.0
+    assert snapshot == ThermostatSnapshot(**snapshot.as_dict())
+    assert hash(snapshot) == hash(snapshot.replace())
+    assert snapshot.diff(None) == snapshot.__slots__
+
+
+def test_unknown_field():
+    with pytest.raises(TypeError):
+        ThermostatSnapshot(unknown=1)
+
+
+def test_temperature_step_passes_equal_deadband():
+    suppressed = [
+        start for start in range(1500, 2500)
+        if _snapshot((start + 10) / 100).with_deadbands(
+            _snapshot(start / 100), 0.1).current_temperature == start / 100
+    ]
+    assert suppressed == []
+
+
+def test_temperature_deadband():
+    previous = _snapshot(20.0)
+    assert _snapshot(20.09).with_deadbands(previous, 0.1) \
+        .current_temperature == 20.0
+    assert _snapshot(19.91).with_deadbands(previous, 0.1) \
+        .current_temperature == 20.0
+    assert _snapshot(20.09).with_deadbands(previous, 0) \
+        .current_temperature == 20.09
+    assert _snapshot(20.09).with_deadbands(None, 0.1) \
+        .current_temperature == 20.09
+
+
+def test_modulation_deadband_follows_burner():
+    assert _snapshot(20.0, 42).with_deadbands(_snapshot(20.0, 40), 0, 5) \
+        .modulation_level == 40
+    assert _snapshot(20.0, 3).with_deadbands(_snapshot(20.0, 0), 0, 5) \
+        .modulation_level == 3
+    assert _snapshot(20.0, 0).with_deadbands(_snapshot(20.0, 3), 0, 5) \
+        .modulation_level == 0
+
+
+def test_deadbands_with_missing_previous_values():
+    previous = ThermostatSnapshot(current_setpoint=20.0)
+    snapshot = _snapshot(20.09, 42)
+    assert snapshot.with_deadbands(previous, 0.1, 5) == snapshot
+    assert snapshot.with_deadbands(previous) == snapshot